@@ -1,16 +1,20 @@
 import random
 import math
 import copy
-# import numpy as np # 필요시 사용
+import numpy as np
 import os
 import signal
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import matplotlib.font_manager as fm
+import time
+import json
+import argparse
+import threading
+import queue
+import csv
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+# matplotlib은 그래프를 그릴 때만 layout_rendering 모듈에서 불러옵니다 (코어 임포트는 부작용 없음)
 
-# 한글 폰트 설정
-plt.rcParams['font.family'] ='Malgun Gothic'
-plt.rcParams['axes.unicode_minus'] =False
 interrupted = False
 
 # --- 기존 유틸리티 함수들 (PPO 코드에서 가져옴) ---
@@ -55,12 +59,19 @@ machines_definitions = [
     # {"id": 29, "name": "출하_대기존", "footprint": (5, 3), "cycle_time": 5, "clearance": 1}  # 큰 면적, 매우 짧은 시간
 ]
 
-# 공정 시퀀스 정의
-all_machine_ids_for_sequence = list(range(len(machines_definitions)))
-random.shuffle(all_machine_ids_for_sequence)
-PROCESS_SEQUENCE = all_machine_ids_for_sequence
+# 재현 가능한 실행을 위한 난수 시드 (None이면 실행마다 다른 공정 시퀀스/결과)
+RANDOM_SEED = None
+
+# 공정 시퀀스 정의 (None이면 실행 시작 시 RANDOM_SEED로 시드한 난수로 설비 순서를 섞음. 임포트 시에는 난수를 쓰지 않습니다)
+PROCESS_SEQUENCE = None
 # print(f"사용될 공정 시퀀스: {PROCESS_SEQUENCE}")
 
+def shuffled_process_sequence(all_machines_data):
+    """설비 ID를 전역 random으로 섞은 공정 시퀀스를 만듭니다 (PROCESS_SEQUENCE가 None일 때 사용)."""
+    all_machine_ids_for_sequence = list(range(len(all_machines_data)))
+    random.shuffle(all_machine_ids_for_sequence)
+    return all_machine_ids_for_sequence
+
 # 프로세스 스퀀스를 지정하고 싶으면 위 랜덤 주석처리 -> 아래 시퀀스 주석 해제 -> 이후 원하는 스퀀스로 수정
 # PROCESS_SEQUENCE = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]  # 선형 16단계 공정
 
@@ -73,6 +84,81 @@ TARGET_PRODUCTION_PER_HOUR = 35
 SECONDS_PER_HOUR = 3600
 MATERIAL_TRAVEL_SPEED_UNITS_PER_SECOND = 0.5
 
+# --- 문제 정의 (설비 정의 + 공정 시퀀스 + 공장 크기를 한 번만 컴파일) ---
+class ProblemInstance:
+    """
+    GA 함수들이 공유하는 문제 정의입니다. 설비 정의를 공정 순서(유전자 순서)로 정렬하고
+    footprint, 클리어런스, 사이클 타임 등을 유전자 인덱스로 바로 찾을 수 있는 배열로 만들어 두므로
+    평가 중에 id로 설비 정의를 선형 탐색하지 않습니다. 피클 가능하므로 워커 프로세스에 그대로 보낼 수 있습니다.
+
+    유전자 i = 공정 시퀀스 i번째 설비 (machines_defs[i]).
+    """
+    def __init__(self, all_machines_data, process_sequence, factory_w, factory_h,
+                 target_prod_throughput=TARGET_PRODUCTION_PER_HOUR, material_travel_speed=MATERIAL_TRAVEL_SPEED_UNITS_PER_SECOND):
+        self.machines_definitions = list(all_machines_data) # 원본 설비 정의 (체크포인트/시각화용)
+        self.process_sequence = list(process_sequence)
+        self.factory_w = factory_w
+        self.factory_h = factory_h
+        self.target_prod_throughput = target_prod_throughput
+        self.material_travel_speed = material_travel_speed
+
+        self.machine_by_id = {m["id"]: m for m in self.machines_definitions}
+        missing_ids = [m_id for m_id in self.process_sequence if m_id not in self.machine_by_id]
+        if missing_ids:
+            raise ValueError(f"공정 시퀀스에 정의되지 않은 설비 ID가 있습니다: {missing_ids}")
+        self.machines_defs = [self.machine_by_id[m_id] for m_id in self.process_sequence] # 유전자 순서 설비 정의
+        self.num_machines = len(self.machines_defs)
+        self.gene_index_by_id = {m["id"]: i for i, m in enumerate(self.machines_defs)}
+
+        # 유전자 인덱스로 찾는 연속 배열
+        self.machine_ids = np.array([m["id"] for m in self.machines_defs], dtype=np.int64)
+        self.footprints = np.array([m["footprint"] for m in self.machines_defs], dtype=np.int64).reshape(-1, 2) # (n, 2)
+        self.clearances = np.array([m.get("clearance", 0) for m in self.machines_defs], dtype=np.int64) # (n,)
+        self.cycle_times = np.array([m["cycle_time"] for m in self.machines_defs], dtype=float) # (n,)
+        self.half_extents = self.footprints / 2.0 # 좌상단 -> 중심 오프셋 (n, 2)
+
+        # 공정 순서: 단계 k의 유전자 seq_genes[k], 간선 k = (seq_genes[k], seq_genes[k + 1])
+        self.seq_genes = np.array([self.gene_index_by_id[m_id] for m_id in self.process_sequence], dtype=np.int64)
+        self.edge_genes = np.stack([self.seq_genes[:-1], self.seq_genes[1:]], axis=1) if self.num_machines > 1 else np.empty((0, 2), dtype=np.int64)
+        self.seq_cycle_times = self.cycle_times[self.seq_genes] # 단계별 사이클 타임
+        self._aisle_bits = None # 통로 거리 BFS용 비트 집합 (aisle_bitsets()에서 처음 쓸 때 계산)
+
+    def centers(self, chromosome):
+        """염색체(유전자별 좌상단 좌표)의 설비 중심 좌표 (n, 2)."""
+        return np.asarray(chromosome, dtype=float).reshape(-1, 2) + self.half_extents
+
+    def edge_distances(self, chromosome):
+        """공정 순서 간선별 중심점 간 거리 (len(process_sequence) - 1,)."""
+        centers = self.centers(chromosome)
+        deltas = centers[self.edge_genes[:, 1]] - centers[self.edge_genes[:, 0]]
+        return np.sqrt(deltas[:, 0]**2 + deltas[:, 1]**2)
+
+    def aisle_bitsets(self):
+        """
+        통로 거리 BFS용 비트 집합 (처음 호출 시 한 번 계산). 테두리 한 칸을 두른 (W+2) x (H+2) 격자의 셀 (x, y)를
+        정수의 비트 (x + 1) * stride + (y + 1)로 나타내며, 몸체/접근점 템플릿은 설비를 (0, 0)에 놓았을 때의 모양입니다.
+
+        Returns:
+            tuple: (stride, 공장 내부 셀 비트, 유전자별 몸체 템플릿, 유전자별 접근점(몸체 4면에 붙은 칸) 템플릿)
+        """
+        if self._aisle_bits is None:
+            stride = self.factory_h + 2
+            def to_bits(cells):
+                return int.from_bytes(np.packbits(cells.ravel(), bitorder="little").tobytes(), "little")
+            interior = np.zeros((self.factory_w + 2, stride), dtype=bool)
+            interior[1:-1, 1:-1] = True
+            body_templates, access_templates = [], []
+            for m_width, m_height in self.footprints.tolist():
+                body = np.zeros((m_width + 2, stride), dtype=bool)
+                body[1:-1, 1:m_height + 1] = True
+                access = np.zeros_like(body)
+                access[1:-1, 0] = access[1:-1, m_height + 1] = True # 위/아래 면
+                access[0, 1:m_height + 1] = access[-1, 1:m_height + 1] = True # 좌/우 면
+                body_templates.append(to_bits(body))
+                access_templates.append(to_bits(access))
+            self._aisle_bits = (stride, to_bits(interior), body_templates, access_templates)
+        return self._aisle_bits
+
 
 def initialize_layout_grid(width, height):
     return [[-1 for _ in range(height)] for _ in range(width)]
@@ -101,141 +187,384 @@ def place_machine_on_grid(grid, machine_id, machine_footprint, x, y):
         for j in range(y, y + m_height):
             grid[i][j] = machine_id
 
-def calculate_total_distance(machine_positions, process_sequence):
-    total_distance = 0
-    if not machine_positions or len(process_sequence) < 2:
-        return float('inf')
-    for m_id in process_sequence:
-        if m_id not in machine_positions or 'center_x' not in machine_positions[m_id] or 'center_y' not in machine_positions[m_id]:
-            return float('inf')
-    for i in range(len(process_sequence) - 1):
-        m1_id, m2_id = process_sequence[i], process_sequence[i+1]
-        if m1_id not in machine_positions or m2_id not in machine_positions:
-             return float('inf')
-        pos1_center_x = machine_positions[m1_id]['center_x']
-        pos1_center_y = machine_positions[m1_id]['center_y']
-        pos2_center_x = machine_positions[m2_id]['center_x']
-        pos2_center_y = machine_positions[m2_id]['center_y']
-        distance = math.sqrt((pos1_center_x - pos2_center_x)**2 + (pos1_center_y - pos2_center_y)**2)
-        total_distance += distance
-    return total_distance
-
-def get_machine_cycle_time(machine_id, all_machines_data):
-    for m_def in all_machines_data:
-        if m_def["id"] == machine_id:
-            return m_def["cycle_time"]
-    return float('inf')
-
-def estimate_line_throughput(machine_positions, process_sequence, all_machines_data, travel_speed):
-    if not machine_positions or not process_sequence: return 0.0
-    for m_id in process_sequence:
-        if m_id not in machine_positions or 'center_x' not in machine_positions[m_id] or 'center_y' not in machine_positions[m_id]:
-            return 0.0
-    max_stage_time = 0.0
-    for i in range(len(process_sequence)):
-        current_machine_id = process_sequence[i]
-        machine_cycle_time = get_machine_cycle_time(current_machine_id, all_machines_data)
-        if machine_cycle_time == float('inf'): return 0.0
-        travel_time = 0.0
-        if i > 0:
-            prev_machine_id = process_sequence[i-1]
-            if prev_machine_id in machine_positions and current_machine_id in machine_positions:
-                pos_prev, pos_curr = machine_positions[prev_machine_id], machine_positions[current_machine_id]
-                distance = math.sqrt((pos_prev['center_x'] - pos_curr['center_x'])**2 + (pos_prev['center_y'] - pos_curr['center_y'])**2)
-                if travel_speed > 0: travel_time = distance / travel_speed
-                else: travel_time = float('inf')
-            else: return 0.0
-        current_stage_total_time = machine_cycle_time + travel_time
-        if current_stage_total_time > max_stage_time: max_stage_time = current_stage_total_time
+# --- 배치 마스크 엔진 (NumPy 점유 배열 + 누적합 테이블) ---
+class PlacementEngine:
+    """
+    점유 상태를 NumPy 배열로 관리하고, 누적합 테이블(summed-area table)을 이용해
+    특정 footprint/clearance 조합으로 배치 가능한 모든 좌상단 위치를 한 번에 계산합니다.
+    can_place_machine을 모든 (x, y)에 대해 반복 호출하는 것과 동일한 결과를 냅니다.
+    """
+    def __init__(self, factory_w, factory_h):
+        self.factory_w = factory_w
+        self.factory_h = factory_h
+        self.occupancy = np.zeros((factory_w, factory_h), dtype=np.int32) # 셀별 설비 몸체 점유 수 (0: 빈 공간)
+        self._sat = None # 점유 변경 시 무효화되는 누적합 테이블 캐시
+
+    def place(self, machine_footprint, x, y):
+        m_width, m_height = machine_footprint
+        self.occupancy[x:x + m_width, y:y + m_height] += 1
+        self._sat = None
+
+    def remove(self, machine_footprint, x, y):
+        m_width, m_height = machine_footprint
+        self.occupancy[x:x + m_width, y:y + m_height] -= 1
+        self._sat = None
+
+    def summed_area_table(self):
+        """sat[i, j] = occupancy[:i, :j] 영역의 점유 셀 수. (W+1)×(H+1) 크기."""
+        if self._sat is None:
+            sat = np.zeros((self.factory_w + 1, self.factory_h + 1), dtype=np.int32)
+            np.cumsum(np.cumsum(self.occupancy > 0, axis=0), axis=1, out=sat[1:, 1:])
+            self._sat = sat
+        return self._sat
+
+    def valid_positions_mask(self, machine_footprint, machine_clearance):
+        """
+        배치 가능한 좌상단 위치의 불리언 마스크를 반환합니다.
+
+        Returns:
+            np.ndarray: (W - w + 1) × (H - h + 1) 크기, mask[x, y]가 True면 (x, y)에 배치 가능
+        """
+        m_width, m_height = machine_footprint
+        num_x = self.factory_w - m_width + 1
+        num_y = self.factory_h - m_height + 1
+        if num_x <= 0 or num_y <= 0:
+            return np.zeros((max(num_x, 0), max(num_y, 0)), dtype=bool)
+        xs = np.arange(num_x)
+        ys = np.arange(num_y)
+        # 클리어런스를 포함한 검사 영역을 공장 경계로 잘라낸 [x0, x1) × [y0, y1)
+        x0 = np.maximum(xs - machine_clearance, 0)[:, None]
+        x1 = np.minimum(xs + m_width + machine_clearance, self.factory_w)[:, None]
+        y0 = np.maximum(ys - machine_clearance, 0)[None, :]
+        y1 = np.minimum(ys + m_height + machine_clearance, self.factory_h)[None, :]
+        sat = self.summed_area_table()
+        occupied_cells = sat[x1, y1] - sat[x0, y1] - sat[x1, y0] + sat[x0, y0]
+        return occupied_cells == 0
+
+    def sample_position(self, machine_footprint, machine_clearance):
+        """마스크에서 배치 가능 위치 하나를 균등하게 뽑습니다. 없으면 None."""
+        if _profiler is not None: _profiler.counts["sample_position"] += 1
+        mask = self.valid_positions_mask(machine_footprint, machine_clearance)
+        candidates = np.flatnonzero(mask) # x 우선 순서 (기존 이중 루프와 동일한 순서)
+        if candidates.size == 0:
+            return None
+        chosen_x, chosen_y = divmod(int(random.choice(candidates)), mask.shape[1])
+        return (chosen_x, chosen_y)
+
+    def in_bounds(self, machine_footprint, x, y):
+        m_width, m_height = machine_footprint
+        return 0 <= x and x + m_width <= self.factory_w and 0 <= y and y + m_height <= self.factory_h
+
+    def can_place(self, machine_footprint, machine_clearance, x, y):
+        """(x, y) 한 곳에 대한 can_place_machine과 같은 판정 (클리어런스 영역 안에 점유 셀이 없어야 함)."""
+        if _profiler is not None: _profiler.counts["can_place"] += 1
+        if not self.in_bounds(machine_footprint, x, y): return False
+        m_width, m_height = machine_footprint
+        return not self.occupancy[max(0, x - machine_clearance):x + m_width + machine_clearance,
+                                  max(0, y - machine_clearance):y + m_height + machine_clearance].any()
+
+    def candidate_positions(self, machine_footprint, machine_clearance):
+        """배치 가능한 모든 좌상단 위치를 x 우선 순서의 (xs, ys) 배열 쌍으로 반환합니다."""
+        if _profiler is not None: _profiler.counts["candidate_positions"] += 1
+        mask = self.valid_positions_mask(machine_footprint, machine_clearance)
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0: return candidates, candidates
+        return np.divmod(candidates, mask.shape[1])
+
+# --- 희소 배치 엔진 (버킷 격자 공간 색인) ---
+class SparsePlacementEngine:
+    """
+    배치된 설비 몸체 사각형만 균등 버킷 격자(딕셔너리)에 보관하는 희소 점유 상태입니다.
+    메모리가 공장 면적이 아니라 설비 수에 비례하므로 매우 넓은 공장에서도 쓸 수 있으며,
+    PlacementEngine과 같은 place/remove/in_bounds/can_place/sample_position/candidate_positions 인터페이스를 가집니다.
+    배치 가능 위치 전체 마스크 대신, 기존 몸체의 변·모서리와 공장 벽에 맞닿는 후보 위치만 열거합니다.
+    """
+    def __init__(self, factory_w, factory_h, bucket_size=None):
+        self.factory_w = factory_w
+        self.factory_h = factory_h
+        self.bucket_size = max(1, int(bucket_size if bucket_size is not None else SPARSE_BUCKET_SIZE))
+        self.buckets = {} # (bx, by) -> 그 버킷과 겹치는 몸체 목록 [(x, y, w, h), ...]
+        self.bodies = [] # 배치된 몸체 (x, y, w, h) 목록 (겹친 배치도 그대로 보관)
+        self._body_array = None # 몸체 변경 시 무효화되는 (k, 4) 배열 캐시
+
+    def _bucket_keys(self, x0, y0, x1, y1):
+        """[x0, x1) × [y0, y1) 영역과 겹치는 버킷 키."""
+        size = self.bucket_size
+        for bx in range(x0 // size, (x1 - 1) // size + 1):
+            for by in range(y0 // size, (y1 - 1) // size + 1):
+                yield (bx, by)
+
+    def place(self, machine_footprint, x, y):
+        m_width, m_height = machine_footprint
+        body = (x, y, m_width, m_height)
+        self.bodies.append(body)
+        for key in self._bucket_keys(x, y, x + m_width, y + m_height):
+            self.buckets.setdefault(key, []).append(body)
+        self._body_array = None
+
+    def remove(self, machine_footprint, x, y):
+        m_width, m_height = machine_footprint
+        body = (x, y, m_width, m_height)
+        self.bodies.remove(body)
+        for key in self._bucket_keys(x, y, x + m_width, y + m_height):
+            bucket = self.buckets[key]
+            bucket.remove(body)
+            if not bucket: del self.buckets[key]
+        self._body_array = None
+
+    def in_bounds(self, machine_footprint, x, y):
+        m_width, m_height = machine_footprint
+        return 0 <= x and x + m_width <= self.factory_w and 0 <= y and y + m_height <= self.factory_h
+
+    def can_place(self, machine_footprint, machine_clearance, x, y):
+        """클리어런스 영역과 겹치는 버킷의 몸체만 사각형 교차 검사합니다."""
+        if _profiler is not None: _profiler.counts["can_place"] += 1
+        if not self.in_bounds(machine_footprint, x, y): return False
+        m_width, m_height = machine_footprint
+        x0, y0 = max(0, x - machine_clearance), max(0, y - machine_clearance)
+        x1 = min(self.factory_w, x + m_width + machine_clearance)
+        y1 = min(self.factory_h, y + m_height + machine_clearance)
+        for key in self._bucket_keys(x0, y0, x1, y1):
+            for body_x, body_y, body_w, body_h in self.buckets.get(key, ()):
+                if body_x < x1 and x0 < body_x + body_w and body_y < y1 and y0 < body_y + body_h: return False
+        return True
+
+    def body_array(self):
+        if self._body_array is None:
+            self._body_array = np.array(self.bodies, dtype=np.int64).reshape(-1, 4)
+        return self._body_array
+
+    def candidate_positions(self, machine_footprint, machine_clearance):
+        """
+        공장 네 모서리와, 각 몸체의 상하좌우에 클리어런스만큼 떨어져 변을 맞댄 위치 및 그 행·열의 벽쪽 위치 중
+        배치 가능한 곳을 x 우선 순서의 (xs, ys) 배열 쌍으로 반환합니다. 후보 수는 설비 수에 비례합니다.
+        """
+        if _profiler is not None: _profiler.counts["candidate_positions"] += 1
+        m_width, m_height = machine_footprint
+        max_x, max_y = self.factory_w - m_width, self.factory_h - m_height
+        if max_x < 0 or max_y < 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        bodies = self.body_array()
+        bx, by = bodies[:, 0], bodies[:, 1]
+        right, bottom = bx + bodies[:, 2], by + bodies[:, 3] # 몸체의 오른쪽/아래쪽 끝 (배타)
+        beside_x = (right + machine_clearance, bx - machine_clearance - m_width) # 몸체 오른쪽/왼쪽
+        beside_y = (bottom + machine_clearance, by - machine_clearance - m_height) # 몸체 아래/위
+        aligned_x = (bx, right - m_width, np.zeros_like(bx), np.full_like(bx, max_x)) # 몸체 변 또는 벽에 맞춤
+        aligned_y = (by, bottom - m_height, np.zeros_like(by), np.full_like(by, max_y))
+        cand_x = np.concatenate([[0, 0, max_x, max_x]] + [x for x in beside_x for _ in aligned_y] + [x for _ in beside_y for x in aligned_x])
+        cand_y = np.concatenate([[0, max_y, 0, max_y]] + [y for _ in beside_x for y in aligned_y] + [y for y in beside_y for _ in aligned_x])
+        in_floor = (cand_x >= 0) & (cand_x <= max_x) & (cand_y >= 0) & (cand_y <= max_y)
+        keys = np.unique(cand_x[in_floor] * (max_y + 1) + cand_y[in_floor]) # 중복 제거 + x 우선 정렬
+        cand_x, cand_y = np.divmod(keys, max_y + 1)
+        if bodies.shape[0] == 0 or keys.size == 0: return cand_x, cand_y
+        free = np.ones(keys.size, dtype=bool)
+        chunk = max(1, SPARSE_CANDIDATE_CHUNK // bodies.shape[0]) # 후보×몸체 교차 행렬의 크기를 제한
+        for start in range(0, keys.size, chunk):
+            cx, cy = cand_x[start:start + chunk, None], cand_y[start:start + chunk, None]
+            overlaps = ((bx < cx + m_width + machine_clearance) & (cx - machine_clearance < right)
+                        & (by < cy + m_height + machine_clearance) & (cy - machine_clearance < bottom))
+            free[start:start + chunk] = ~overlaps.any(axis=1)
+        return cand_x[free], cand_y[free]
+
+    def sample_position(self, machine_footprint, machine_clearance):
+        """
+        무작위 위치를 최대 SPARSE_SAMPLE_ATTEMPTS번 뽑아 배치 가능한 첫 위치를 돌려주고,
+        모두 실패하면 candidate_positions 중 하나를 고릅니다. 없으면 None.
+        """
+        if _profiler is not None: _profiler.counts["sample_position"] += 1
+        m_width, m_height = machine_footprint
+        max_x, max_y = self.factory_w - m_width, self.factory_h - m_height
+        if max_x < 0 or max_y < 0: return None
+        for _ in range(SPARSE_SAMPLE_ATTEMPTS):
+            x, y = random.randint(0, max_x), random.randint(0, max_y)
+            if self.can_place(machine_footprint, machine_clearance, x, y): return (x, y)
+        cand_x, cand_y = self.candidate_positions(machine_footprint, machine_clearance)
+        if cand_x.size == 0: return None
+        k = random.randrange(cand_x.size)
+        return (int(cand_x[k]), int(cand_y[k]))
+
+def make_placement_engine(problem, chromosome=None):
+    """
+    공장 면적이 SPARSE_PLACEMENT_MIN_AREA 이상이면 SparsePlacementEngine을, 아니면 PlacementEngine을 만듭니다.
+    chromosome이 주어지면 공장 안에 놓인 설비를 모두 점유시킨 상태로 돌려줍니다 (미배치 유전자는 건너뜀).
+    """
+    if SPARSE_PLACEMENT_MIN_AREA > 0 and problem.factory_w * problem.factory_h >= SPARSE_PLACEMENT_MIN_AREA:
+        engine = SparsePlacementEngine(problem.factory_w, problem.factory_h)
+    else:
+        engine = PlacementEngine(problem.factory_w, problem.factory_h)
+    if chromosome is not None:
+        for m_footprint, (pos_x, pos_y) in zip(problem.footprints.tolist(), chromosome):
+            if engine.in_bounds(m_footprint, pos_x, pos_y): engine.place(m_footprint, pos_x, pos_y)
+    return engine
+
+# --- 염색체별 점유 상태 (제자리 갱신) ---
+class LayoutState:
+    """
+    배치 엔진(make_placement_engine) 하나에 염색체 하나의 배치를 담은 점유 상태입니다.
+    엔진은 만들 때 한 번만 할당하고, load()로 다른 염색체를 담을 때는 이전 설비를 빼고 새 설비를 놓기만 하므로
+    자식마다 공장 면적(W×H) 크기의 배열을 새로 만들지 않습니다 (O(설비 수 × footprint)).
+    설비 하나를 제거 -> 새 위치 탐색 -> 재배치하는 연산은 제자리에서 O(footprint)이며,
+    breed_next_generation이 세대마다 하나를 만들어 mutate와 repair_chromosome이 함께 씁니다.
+    """
+    def __init__(self, problem, chromosome=None):
+        self.footprints = problem.footprints.tolist() # 유전자별 (w, h). 파이썬 int로 두어 좌표 연산을 가볍게 유지
+        self.clearances = problem.clearances.tolist()
+        self.engine = make_placement_engine(problem)
+        self.positions = [(-1, -1)] * problem.num_machines
+        if chromosome is not None: self.load(chromosome)
+
+    def load(self, chromosome):
+        """담고 있던 배치를 비우고 chromosome의 배치로 채웁니다."""
+        self.clear()
+        for i, (pos_x, pos_y) in enumerate(np.asarray(chromosome).tolist()):
+            self.place_machine(i, pos_x, pos_y)
+
+    def clear(self):
+        for i in range(len(self.positions)):
+            self.remove_machine(i)
+
+    def place_machine(self, i, x, y):
+        self.positions[i] = (x, y)
+        if self.engine.in_bounds(self.footprints[i], x, y): # (-1, -1) 등 미배치 유전자는 점유하지 않음
+            self.engine.place(self.footprints[i], x, y)
+
+    def remove_machine(self, i):
+        x, y = self.positions[i]
+        self.positions[i] = (-1, -1)
+        if self.engine.in_bounds(self.footprints[i], x, y):
+            self.engine.remove(self.footprints[i], x, y)
+
+def uses_aisle_distance():
+    """FITNESS_DISTANCE_MODE가 통로 거리 방식인지 (알 수 없는 값이면 ValueError)."""
+    if FITNESS_DISTANCE_MODE not in ("euclidean", "aisle"):
+        raise ValueError(f"알 수 없는 거리 방식: {FITNESS_DISTANCE_MODE}")
+    return FITNESS_DISTANCE_MODE == "aisle"
+
+def aisle_lower_bounds(positions, problem):
+    """
+    간선별 통로 거리의 하한: 두 설비의 접근점 영역(몸체를 한 칸씩 키운 사각형) 사이 맨해튼 간격.
+    positions: (..., n, 2) 배열 -> (..., 간선 수) 배열
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    region_start = positions - 1
+    region_end = positions + problem.footprints # 접근점 영역의 마지막 칸 (x + w, y + h)
+    first, second = problem.edge_genes[:, 0], problem.edge_genes[:, 1]
+    gaps = np.maximum(0, np.maximum(region_start[..., second, :] - region_end[..., first, :],
+                                    region_start[..., first, :] - region_end[..., second, :]))
+    return gaps.sum(axis=-1).astype(float)
+
+def _bitset_bfs(sources, targets, unvisited, stride, max_distance=None):
+    """
+    비트 집합 BFS: 한 층을 시프트 4번(상하좌우)으로 넓혀 sources에서 targets까지의 최단 칸 수를 구합니다.
+    닿지 않으면 inf, max_distance 안에 닿지 않으면 None.
+    """
+    if not sources or not targets: return float('inf')
+    frontier = sources
+    unvisited &= ~sources
+    distance = 0
+    while not frontier & targets:
+        if max_distance is not None and distance >= max_distance: return None
+        frontier = ((frontier << 1) | (frontier >> 1) | (frontier << stride) | (frontier >> stride)) & unvisited
+        if not frontier: return float('inf')
+        unvisited ^= frontier
+        distance += 1
+    return distance
+
+_aisle_distance_cache = None # 프로세스별 통로 거리 캐시 (FitnessCache와 같은 LRU, 값은 간선별 거리 튜플)
+
+def aisle_edge_distances(chromosome, problem, max_total=None):
+    """
+    공정 순서 간선별 통로 거리: 모든 설비 몸체를 장애물로 두고 앞 설비의 접근점들에서 다음 설비의 접근점들까지
+    상하좌우로 이동하는 최단 칸 수입니다 (path_visualizer의 find_machine_access_points와 같은 접근점).
+    격자 전체를 정수 하나의 비트 집합으로 다뤄 BFS 한 층이 정수 연산 몇 번이며, 완료된 결과는 배치 서명별로 캐시합니다.
+
+    Args:
+        max_total: 주어지면 (이미 구한 거리 + 남은 간선 하한)이 이 값을 넘는 순간 계산을 멈춥니다 (조기 중단)
+
+    Returns:
+        tuple: (간선별 거리 리스트, 완료 여부). 접근점끼리 통로로 닿지 않는 간선이 나오면 그 뒤 간선까지 inf입니다.
+               중간에 멈추면 완료 여부가 False이고, 리스트는 구한 거리 + 넘었음을 보이는 하한 + 남은 간선 하한입니다.
+    """
+    global _aisle_distance_cache
+    cache_key = None
+    if AISLE_DISTANCE_CACHE_SIZE > 0:
+        if _aisle_distance_cache is None or _aisle_distance_cache.max_size != AISLE_DISTANCE_CACHE_SIZE:
+            _aisle_distance_cache = FitnessCache(AISLE_DISTANCE_CACHE_SIZE)
+        cache_key = FitnessCache.make_key(chromosome)
+        cached = _aisle_distance_cache.get(cache_key)
+        if cached is not None: return list(cached), True
+    if _profiler is not None: _profiler.counts["aisle_edge_distances"] += 1
+
+    stride, interior, body_templates, access_templates = problem.aisle_bitsets()
+    positions = np.asarray(chromosome, dtype=np.int64).reshape(-1, 2)
+    shifts = (positions[:, 0] * stride + positions[:, 1]).tolist()
+    bodies = 0
+    for body_template, shift in zip(body_templates, shifts): bodies |= body_template << shift
+    free = interior & ~bodies
+    lower_bounds = aisle_lower_bounds(positions, problem).tolist() if max_total is not None else None
+    remaining_lower = sum(lower_bounds) if lower_bounds else 0.0
+
+    distances, total = [], 0
+    for k, (first, second) in enumerate(problem.edge_genes.tolist()):
+        budget = None
+        if max_total is not None:
+            remaining_lower -= lower_bounds[k]
+            budget = max_total - total - remaining_lower # 이 간선에 쓸 수 있는 최대 거리
+            if budget < lower_bounds[k]:
+                return distances + lower_bounds[k:], False
+        sources = (access_templates[first] << shifts[first]) & free
+        targets = (access_templates[second] << shifts[second]) & free
+        distance = _bitset_bfs(sources, targets, free, stride, budget)
+        if distance is None:
+            return distances + [math.floor(budget) + 1] + lower_bounds[k + 1:], False
+        if distance == float('inf'):
+            distances += [distance] * (len(problem.edge_genes) - k)
+            break
+        distances.append(distance)
+        total += distance
+    if cache_key is not None: _aisle_distance_cache.put(cache_key, tuple(distances))
+    return distances, True
+
+def layout_edge_distances(chromosome, problem):
+    """FITNESS_DISTANCE_MODE에 따른 공정 순서 간선별 거리 (직선 거리 또는 통로 거리)."""
+    if uses_aisle_distance(): return np.array(aisle_edge_distances(chromosome, problem)[0], dtype=float)
+    return problem.edge_distances(chromosome)
+
+def calculate_total_distance(chromosome, problem, edge_distances=None):
+    """공정 순서대로 인접한 설비 사이 거리(FITNESS_DISTANCE_MODE)의 합 (앞에서부터 순차 합산). edge_distances: 미리 구한 간선별 거리."""
+    if problem.num_machines < 2: return float('inf')
+    if edge_distances is None: edge_distances = layout_edge_distances(chromosome, problem)
+    return sum(edge_distances.tolist())
+
+def estimate_line_throughput(chromosome, problem, edge_distances=None):
+    """단계 시간(사이클 타임 + 직전 설비에서의 이송 시간) 중 최댓값을 병목으로 본 시간당 생산량."""
+    if problem.num_machines == 0: return 0.0
+    stage_times = problem.seq_cycle_times.copy()
+    if edge_distances is None: edge_distances = layout_edge_distances(chromosome, problem)
+    if problem.material_travel_speed > 0: stage_times[1:] += edge_distances / problem.material_travel_speed
+    else: stage_times[1:] = float('inf')
+    max_stage_time = float(stage_times.max())
     if max_stage_time <= 0 or max_stage_time == float('inf'): return 0.0
     return SECONDS_PER_HOUR / max_stage_time
 
-def print_layout(grid, machine_positions):
+def print_layout(grid, machine_positions, problem):
     print("--- 현재 레이아웃 ---")
     transposed_grid = [list(row) for row in zip(*grid)]
-    for row_idx_actual in range(FACTORY_HEIGHT -1, -1, -1):
-        row_to_print = [f"{grid[col_idx_actual][row_idx_actual]:2d}" if grid[col_idx_actual][row_idx_actual] != -1 else "__" for col_idx_actual in range(FACTORY_WIDTH)]
+    for row_idx_actual in range(problem.factory_h -1, -1, -1):
+        row_to_print = [f"{grid[col_idx_actual][row_idx_actual]:2d}" if grid[col_idx_actual][row_idx_actual] != -1 else "__" for col_idx_actual in range(problem.factory_w)]
         print(f"Y{row_idx_actual:<2}| " + " ".join(row_to_print))
-    header = "    " + " ".join(f"X{i:<2}" for i in range(FACTORY_WIDTH))
+    header = "    " + " ".join(f"X{i:<2}" for i in range(problem.factory_w))
     print("-" * len(header)); print(header)
     if not machine_positions: print("배치된 설비 없음"); return
     print("\n--- 설비 위치 (좌상단, 중심) ---")
-    for machine_id in PROCESS_SEQUENCE:
+    for machine_id in problem.process_sequence:
         if machine_id in machine_positions:
             pos_data = machine_positions[machine_id]
-            machine_def = next((m for m in machines_definitions if m["id"] == machine_id), None)
+            machine_def = problem.machine_by_id.get(machine_id)
             machine_name = machine_def["name"] if machine_def else "알수없음"
             print(f"설비 ID {machine_id} ({machine_name}): 좌상단 ({pos_data['x']}, {pos_data['y']}), 중심 ({pos_data['center_x']:.1f}, {pos_data['center_y']:.1f})")
 
-def visualize_layout_plt(grid_layout_to_show, machine_positions_map, factory_w, factory_h, process_sequence_list, machine_definitions_list, filename="ga_best_layout.png"):
-    """
-    matplotlib을 사용하여 최종 레이아웃을 시각화하고 파일로 저장합니다.
-    """
-    fig, ax = plt.subplots(1, figsize=(factory_w/2, factory_h/2 + 1)) # 그림 크기 조절
-    ax.set_xlim(-0.5, factory_w - 0.5)
-    ax.set_ylim(-0.5, factory_h - 0.5)
-    ax.set_xticks(range(factory_w))
-    ax.set_yticks(range(factory_h))
-    ax.set_xticklabels(range(factory_w))
-    ax.set_yticklabels(range(factory_h))
-    ax.grid(True, linestyle='--', alpha=0.7)
-    ax.set_aspect('equal', adjustable='box')
-    ax.invert_yaxis() # 화면 위쪽을 Y=0으로 (일반적인 배열 인덱스와 유사하게)
-
-    # 색상맵 (머신 ID별로 다른 색상) - 수정된 부분
-    cmap = plt.colormaps.get_cmap('viridis')
-    num_machines = len(machine_definitions_list)
-    
-    # PROCESS_SEQUENCE 순서대로 머신 정보 가져오기 위한 딕셔너리
-    machines_dict_by_id = {m['id']: m for m in machine_definitions_list}
-
-    for machine_id_in_seq in process_sequence_list:
-        if machine_id_in_seq in machine_positions_map:
-            pos_data = machine_positions_map[machine_id_in_seq]
-            machine_info = machines_dict_by_id.get(machine_id_in_seq)
-
-            if machine_info:
-                x, y = pos_data['x'], pos_data['y']
-                width, height = machine_info['footprint']
-                clearance = machine_info.get('clearance', 0)
-                
-                # 머신 본체 그리기 - 수정된 색상 사용 방법
-                color_value = machine_id_in_seq / max(num_machines - 1, 1)  # 0~1 사이의 값으로 정규화
-                rect_body = patches.Rectangle((x - 0.5, y - 0.5), width, height,
-                                              linewidth=1.5, edgecolor='black',
-                                              facecolor=cmap(color_value), alpha=0.7)
-                ax.add_patch(rect_body)
-
-                # 머신 ID 및 이름 텍스트 (중앙에 표시)
-                # 글자 크기, 위치 등은 필요에 따라 조절
-                text_x = x + width / 2 - 0.5
-                text_y = y + height / 2 - 0.5
-                ax.text(text_x, text_y, f"M{machine_id_in_seq}\n({machine_info['name'][:5]}..)",
-                        ha='center', va='center', fontsize=6, color='white', weight='bold')
-                
-                # 클리어런스 영역 그리기 (선택적) - 수정된 색상 사용 방법
-                if clearance > 0:
-                    rect_clearance = patches.Rectangle(
-                        (x - clearance - 0.5, y - clearance - 0.5),
-                        width + 2 * clearance, height + 2 * clearance,
-                        linewidth=1, edgecolor=cmap(color_value),
-                        facecolor='none', linestyle=':', alpha=0.5
-                    )
-                    ax.add_patch(rect_clearance)
-
-    plt.title("Optimized Factory Layout (GA)")
-    plt.xlabel("Factory Width (X)")
-    plt.ylabel("Factory Height (Y)")
-    plt.gca().invert_yaxis() # Y축을 위에서 아래로 증가하도록 (일반적인 그리드처럼)
-
-    try:
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        print(f"📊 최종 레이아웃 시각화 이미지 저장 완료: {filename}")
-    except Exception as e:
-        print(f"레이아웃 이미지 저장 중 오류 발생: {e}")
-    plt.close(fig) # 다음 플롯을 위해 그림 닫기
-
-
 def signal_handler(signum, frame):
     global interrupted
     print("\n\n⚠️  CTRL+C 감지! 현재 세대 완료 후 그래프를 저장하고 종료합니다...")
@@ -246,66 +575,205 @@ POPULATION_SIZE = 300       # 한 세대 내 개체(염색체 또는 해)의 총
 NUM_GENERATIONS = 300     # 알고리즘이 반복할 총 세대 수. 충분히 커야 최적해에 수렴할 가능성이 높아집니다.
 MUTATION_RATE = 0.5     # 각 개체가 변이 연산을 겪을 확률 (0.0 ~ 1.0). 너무 낮으면 지역 최적해에 빠지기 쉽고, 너무 높으면 수렴이 불안정해질 수 있습니다.
 CROSSOVER_RATE = 0.8      # 두 부모 개체 간에 교차 연산이 발생할 확률 (0.0 ~ 1.0). 일반적으로 높은 값을 사용합니다.
+MUTATION_RATE_PER_GENE = 0.05 # 변이를 겪는 개체에서 각 유전자(설비)가 새 위치로 옮겨질 확률.
+REPAIR_OFFSPRING = True   # 교차/변이 후 겹침·클리어런스를 위반한 설비를 가장 가까운 배치 가능 위치로 옮겨 자식을 유효하게 만듭니다.
+SEEDING_GREEDY_SHARE = 0.2 # 초기 집단 중 탐욕적 구성 휴리스틱으로 만들 개체의 비율 (0.0 ~ 1.0). 나머지는 무작위 배치.
+SEEDING_MODE = "mixed"     # 구성 휴리스틱 방식. "nearest": 직전 설비에 가장 가깝게, "serpentine": ㄹ자 띠 순서, "mixed": 둘을 번갈아.
 ELITISM_COUNT = 5         # 각 세대에서 다음 세대로 직접 전달될 가장 우수한 개체의 수. 최고 해의 손실을 방지합니다.
 TOURNAMENT_SIZE = 5       # 토너먼트 선택 방식에서 각 토너먼트에 참여할 개체의 수. 클수록 선택 압력이 높아져 우수한 개체가 더 잘 선택됩니다.
+NUM_EVAL_WORKERS = 0      # 적합도 병렬 평가에 사용할 프로세스 수. 0 또는 1이면 직렬 평가. 평가 결과는 직렬 경로와 동일합니다. 섬 모델(ISLAND_COUNT > 1)에서는 사용하지 않습니다.
+FITNESS_CACHE_SIZE = 20000 # 적합도 캐시(LRU)에 보관할 최대 염색체 수. 0이면 캐시 사용 안 함. 엘리트/중복 개체의 재평가를 생략합니다.
+ISLAND_COUNT = 0          # 섬 모델에서 독립 집단(섬)의 수. 섬마다 별도 프로세스에서 POPULATION_SIZE 크기로 진화합니다. 0 또는 1이면 단일 집단.
+ISLAND_MIGRATION_INTERVAL = 10 # 이주 주기(세대). 이 세대 수마다 섬 사이에서 상위 개체가 이동합니다.
+ISLAND_MIGRATION_COUNT = 2     # 이주 한 번에 섬마다 내보내는 상위 개체 수 (최대 ELITISM_COUNT).
+ISLAND_TOPOLOGY = "ring"       # 이주 경로. "ring": 다음 섬으로만, "full": 다른 모든 섬으로.
+FEASIBILITY_SWEEP_THRESHOLD = 64 # 배치 유효성 검사(단일 배치와 집단 전체 모두)에서 이 설비 수를 넘으면 N×N 쌍 검사 대신 스윕 라인을 사용합니다.
+FEASIBILITY_BLOCK_PAIRS = 1 << 22 # 집단 유효성 검사에서 한 번에 만드는 개체×설비×설비 쌍 행렬의 최대 원소 수. 넘으면 개체를 블록으로 나눠 검사합니다.
+MEMETIC_ELITE_COUNT = 0   # 매 세대 평가 직후 국소 탐색(언덕 오르기)으로 다듬을 상위 개체 수. 0이면 메메틱 단계 사용 안 함.
+MEMETIC_MAX_MOVES = 200   # 개체 하나를 다듬을 때 시도할 최대 이동 수 (한 칸 이동, 이웃 쪽 밀기, 같은 크기 설비 맞바꾸기).
+MEMETIC_TIME_BUDGET_SECONDS = 0.2 # 세대당 국소 탐색 시간 예산(초). 0이면 MEMETIC_MAX_MOVES로만 제한 (시간 예산이 걸리면 같은 시드라도 결과가 달라질 수 있음).
+SPARSE_PLACEMENT_MIN_AREA = 250000 # 공장 면적(W×H)이 이 값 이상이면 면적 비례 점유 배열 대신 설비 수 비례 버킷 격자 색인을 사용합니다. 0이면 항상 점유 배열.
+SPARSE_BUCKET_SIZE = 16   # 버킷 격자 한 칸의 변 길이. 대표적인 설비 크기 정도가 적당합니다.
+SPARSE_SAMPLE_ATTEMPTS = 64 # 버킷 격자 색인에서 무작위 위치를 뽑아 보는 횟수. 모두 실패하면 몸체에 맞댄 후보 위치 중에서 고릅니다.
+SPARSE_CANDIDATE_CHUNK = 1 << 20 # 후보 위치 검사 시 한 번에 만드는 후보×몸체 교차 행렬의 최대 원소 수.
+CHECKPOINT_FILE = "ga_checkpoint.npz" # 체크포인트 파일 경로. --resume에 경로를 주지 않으면 이 파일에서 재개합니다.
+CHECKPOINT_INTERVAL = 10  # 이 세대 수마다 체크포인트 저장 (백그라운드 스레드). 0이면 중단(CTRL+C) 시에만 저장합니다.
+METRICS_FILE = "ga_metrics.jsonl" # 세대별 지표를 한 줄씩 스트리밍할 파일 (.csv면 CSV, 그 외 JSON Lines). 빈 문자열이면 기록하지 않습니다.
+
+# 종료 조건 (NUM_GENERATIONS 전에 멈추는 조건. 0 또는 False면 해당 조건을 사용하지 않음)
+EARLY_STOP_STAGNATION_WINDOW = 0  # 이 세대 수 동안 최고 적합도가 EARLY_STOP_MIN_IMPROVEMENT 이상 개선되지 않으면 종료.
+EARLY_STOP_MIN_IMPROVEMENT = 1e-6 # 개선으로 인정할 최소 최고 적합도 증가량.
+EARLY_STOP_MIN_DIVERSITY = 0.0    # 집단 다양성(population_diversity)이 이 값 아래로 떨어지면 종료.
+TIME_BUDGET_SECONDS = 0           # 실행 시간 예산(초). 초과하면 현재 세대 후 종료 (재개한 경우 재개 시점부터 계산).
+STOP_ON_TARGET_THROUGHPUT = False # 최고 개체의 생산량이 TARGET_PRODUCTION_PER_HOUR에 도달하면 종료.
+
+# 적응형 연산자 비율 (다양성이 낮거나 개선이 정체될수록 변이를 늘리고 교차를 줄임)
+ADAPTIVE_OPERATOR_RATES = False   # True면 매 세대 MUTATION_RATE/CROSSOVER_RATE/MUTATION_RATE_PER_GENE을 아래 범위에서 조절합니다.
+ADAPTIVE_DIVERSITY_TARGET = 0.1   # 다양성이 이 값보다 낮아질수록 탐색 압력을 높입니다.
+ADAPTIVE_STAGNATION_WINDOW = 30   # 정체 세대 수가 이 값에 가까워질수록 탐색 압력을 높입니다.
+MUTATION_RATE_MAX = 0.9           # 탐색 압력 최대일 때의 개체 변이 확률.
+MUTATION_RATE_PER_GENE_MAX = 0.2  # 탐색 압력 최대일 때의 유전자별 변이 확률.
+CROSSOVER_RATE_MIN = 0.5          # 탐색 압력 최대일 때의 교차 확률.
 
 # 적합도 함수 가중치 (문제의 특성 및 목표에 따라 실험적으로 조정 필요)
 FITNESS_THROUGHPUT_WEIGHT = 1.0       # 적합도 계산 시 생산량에 적용될 가중치.
 FITNESS_DISTANCE_WEIGHT = 0.005     # 적합도 계산 시 총 이동 거리에 적용될 가중치. 거리는 최소화 대상이므로 음수 또는 빼기 형태로 반영됩니다. (값의 스케일에 따라 조정)
 BONUS_FOR_TARGET_ACHIEVEMENT_FACTOR = 0.2 # 시간당 목표 생산량 달성 시 적합도에 추가될 보너스의 비율 (생산량 * 이 값).
 
+# 통로 거리 적합도 (설비 중심 사이 직선 거리 대신 다른 설비 몸체를 피해 가는 실제 이동 거리로 평가)
+FITNESS_DISTANCE_MODE = "euclidean" # "euclidean": 공정 순서상 인접한 설비 중심 사이 직선 거리, "aisle": 두 설비 접근점(몸체 4면에 붙은 빈 칸) 사이 상하좌우 최단 경로 칸 수.
+AISLE_DISTANCE_CACHE_SIZE = 20000 # 통로 거리 캐시(LRU, 키 = 배치 서명(염색체 좌표 바이트열))에 보관할 최대 배치 수. 0이면 캐시 사용 안 함.
+AISLE_CUTOFF_FRACTION = 0.25      # 세대마다 유효 개체의 (1 - 이 비율) 몫을 먼저 정확히 평가해 그 최저 적합도를 문턱으로 삼고, 나머지 중 문턱 아래인 개체는 통로 거리 계산을 멈추고 고정값(-inf)으로 둡니다. 0이면 모두 정확히 계산.
+
+# 성능 프로파일링 (모두 PROFILE_PHASES가 True일 때만 동작. 꺼져 있으면 호출 수 집계 지점마다 None 비교 한 번의 비용)
+PROFILE_PHASES = False            # True면 세대 단계별 벽시계/CPU 시간과 주요 함수 호출 수를 진행 상황 출력과 요약 파일에 기록합니다.
+PROFILE_SUMMARY_FILE = "ga_profile_summary.json" # 실행 종료 시 단계별 누적 시간/호출 수를 저장할 파일.
+PROFILE_CAPTURE_GENERATIONS = []  # 이 세대 번호(1부터)들은 cProfile로 통째로 기록해 ga_profile_gen{세대}.prof로 저장 (단일 집단 모드만).
+PROFILE_TRACEMALLOC = False       # True면 캡처 세대 동안 tracemalloc으로 메모리 할당 상위 위치를 요약 파일에 기록합니다.
+
+# --- 단계별 프로파일링 ---
+class PhaseProfiler:
+    """
+    세대 단계(evaluation, local_search, ranking, selection, crossover, mutation, repair, initialization)별
+    벽시계/CPU 시간과 주요 함수 호출 수(counts)를 모읍니다. 호출 수는 세대 루프가 실제로 지나는 지점에서 셉니다:
+    배치 엔진의 can_place/sample_position/candidate_positions, 집단 평가 진입점에서 센 evaluated_individuals,
+    통로 거리 BFS를 실제로 수행한 aisle_edge_distances. 프로세스마다 하나(_profiler)만 활성화되며,
+    evolve_generation이 세대 끝에 take()로 값을 꺼내 세대 통계에 담으므로 섬 워커의 값도 메인으로 모입니다.
+    """
+    def __init__(self):
+        self.wall_seconds = defaultdict(float)
+        self.cpu_seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.wall_seconds[name] += time.perf_counter() - wall_start
+            self.cpu_seconds[name] += time.process_time() - cpu_start
+
+    def take(self):
+        """지금까지 모은 값을 {"wall_seconds", "cpu_seconds", "counts"} dict로 돌려주고 0으로 되돌립니다."""
+        snapshot = {"wall_seconds": dict(self.wall_seconds), "cpu_seconds": dict(self.cpu_seconds), "counts": dict(self.counts)}
+        self.wall_seconds.clear(); self.cpu_seconds.clear(); self.counts.clear()
+        return snapshot
+
+_profiler = None # 활성화된 PhaseProfiler (프로파일링을 쓰지 않으면 None)
+
+def profile_phase(name):
+    """프로파일링 중이면 name 단계의 시간을 재는 컨텍스트, 아니면 아무것도 하지 않는 컨텍스트."""
+    return _profiler.phase(name) if _profiler is not None else nullcontext()
+
+def merge_profiles(profiles, into=None):
+    """take() 결과 여러 개를 항목별로 더합니다 (섬 모델은 섬별 시간을 합산한 값)."""
+    merged = into if into is not None else {"wall_seconds": {}, "cpu_seconds": {}, "counts": {}}
+    for profile in profiles:
+        for group in ("wall_seconds", "cpu_seconds", "counts"):
+            for name, value in profile[group].items():
+                merged[group][name] = merged[group].get(name, 0) + value
+    return merged
+
+def format_phase_times(profile):
+    """진행 상황 출력용 단계별 벽시계 시간 문자열 (ms)."""
+    return " ".join(f"{name} {seconds * 1000:.1f}" for name, seconds in profile["wall_seconds"].items())
+
+def format_call_counts(profile):
+    """진행 상황 출력용 호출 수 문자열."""
+    return " ".join(f"{name} {count}" for name, count in sorted(profile["counts"].items()))
+
 # --- GA 핵심 함수 ---
-def create_individual(machines_in_processing_order_defs, factory_w, factory_h):
+def create_individual(problem):
     chromosome = []
-    grid = initialize_layout_grid(factory_w, factory_h)
-    for machine_def in machines_in_processing_order_defs:
-        valid_placements = []
-        m_footprint, m_clearance = machine_def["footprint"], machine_def.get("clearance", 0)
-        for x in range(factory_w - m_footprint[0] + 1):
-            for y in range(factory_h - m_footprint[1] + 1):
-                if can_place_machine(grid, m_footprint, m_clearance, x, y, factory_w, factory_h):
-                    valid_placements.append((x, y))
-        if not valid_placements: chromosome.append((-1, -1))
+    engine = make_placement_engine(problem)
+    for m_footprint, m_clearance in zip(problem.footprints.tolist(), problem.clearances.tolist()):
+        chosen_position = engine.sample_position(m_footprint, m_clearance)
+        if chosen_position is None: chromosome.append((-1, -1))
         else:
-            chosen_x, chosen_y = random.choice(valid_placements)
-            chromosome.append((chosen_x, chosen_y))
-            place_machine_on_grid(grid, machine_def["id"], m_footprint, chosen_x, chosen_y)
+            chromosome.append(chosen_position)
+            engine.place(m_footprint, *chosen_position)
     return chromosome
 
+# --- 초기 집단 시딩 (탐욕적 구성 휴리스틱) ---
+def create_greedy_individual(problem, serpentine=False):
+    """
+    공정 순서대로 설비를 하나씩, 직전 설비 중심에서 가장 가까운 배치 가능 위치에 놓는 구성 휴리스틱입니다.
+    동일 거리 후보는 무작위로 고르고 첫 설비는 무작위 위치에 놓으므로 호출할 때마다 다른 배치가 나옵니다.
+
+    Args:
+        serpentine: True면 공장을 가로 띠로 나누어 띠마다 진행 방향을 바꾸는(ㄹ자) 순서에서
+                    가장 앞선 배치 가능 위치를 고릅니다 (첫 설비는 좌상단 띠에서 시작).
+
+    Returns:
+        list: 염색체 (놓을 곳이 없는 설비는 (-1, -1))
+    """
+    chromosome = []
+    factory_w = problem.factory_w
+    engine = make_placement_engine(problem)
+    band_height = int((problem.footprints[:, 1] + problem.clearances).max(initial=1))
+    prev_center = None
+    for m_footprint, m_clearance in zip(problem.footprints.tolist(), problem.clearances.tolist()):
+        m_width, m_height = m_footprint
+        cand_x, cand_y = engine.candidate_positions(m_footprint, m_clearance)
+        if cand_x.size == 0:
+            chromosome.append((-1, -1))
+            continue
+        if serpentine:
+            band = cand_y // band_height
+            along = np.where(band % 2 == 0, cand_x, factory_w - m_width - cand_x)
+            score = band * (factory_w + 1) + along
+        elif prev_center is None:
+            score = np.zeros(cand_x.size)
+        else:
+            score = (cand_x + m_width / 2 - prev_center[0])**2 + (cand_y + m_height / 2 - prev_center[1])**2
+        best = int(random.choice(np.flatnonzero(score == score.min())))
+        chosen_position = (int(cand_x[best]), int(cand_y[best]))
+        chromosome.append(chosen_position)
+        engine.place(m_footprint, *chosen_position)
+        prev_center = (chosen_position[0] + m_width / 2, chosen_position[1] + m_height / 2)
+    return chromosome
+
+def create_initial_population(problem, population_size, greedy_share=None, seeding_mode=None):
+    """
+    초기 집단을 만듭니다. 앞쪽 round(population_size * greedy_share)개는 create_greedy_individual로,
+    나머지는 create_individual(무작위)로 채워 다양성을 유지합니다.
+    seeding_mode: "nearest"(직전 설비에 가장 가깝게), "serpentine"(ㄹ자), "mixed"(둘을 번갈아).
+    """
+    if greedy_share is None: greedy_share = SEEDING_GREEDY_SHARE
+    if seeding_mode is None: seeding_mode = SEEDING_MODE
+    num_greedy = min(population_size, int(round(population_size * greedy_share)))
+    population = []
+    for k in range(num_greedy):
+        serpentine = seeding_mode == "serpentine" or (seeding_mode == "mixed" and k % 2 == 1)
+        population.append(create_greedy_individual(problem, serpentine=serpentine))
+    population.extend(create_individual(problem) for _ in range(population_size - num_greedy))
+    return population
+
 # [MODIFIED] calculate_fitness 함수 수정: 거리, 생산량, 유효성 여부 반환
-def calculate_fitness(chromosome, machines_defs_ordered_by_proc_seq, process_seq_ids,
-                      factory_w, factory_h, target_prod_throughput, material_travel_speed):
-    grid = initialize_layout_grid(factory_w, factory_h)
-    machine_positions = {}
-    all_machines_placed_successfully = True
-    
+def calculate_fitness(chromosome, problem):
     # 기본 반환값 (유효하지 않을 경우)
     result = {"fitness": -float('inf'), "distance": float('inf'), "throughput": 0.0, "is_valid": False}
 
-    if len(chromosome) != len(machines_defs_ordered_by_proc_seq):
+    if len(chromosome) != problem.num_machines:
         return result
 
-    for i, machine_def in enumerate(machines_defs_ordered_by_proc_seq):
-        pos_x, pos_y = chromosome[i]
-        if pos_x == -1 and pos_y == -1:
-            all_machines_placed_successfully = False; break
-        m_footprint, m_clearance, m_id = machine_def["footprint"], machine_def.get("clearance", 0), machine_def["id"]
-        if not can_place_machine(grid, m_footprint, m_clearance, pos_x, pos_y, factory_w, factory_h):
-            all_machines_placed_successfully = False; break
-        place_machine_on_grid(grid, m_id, m_footprint, pos_x, pos_y)
-        machine_positions[m_id] = {"x": pos_x, "y": pos_y, "center_x": pos_x + m_footprint[0]/2.0, "center_y": pos_y + m_footprint[1]/2.0}
-
-    if not all_machines_placed_successfully or len(machine_positions) != len(machines_defs_ordered_by_proc_seq):
+    # 그리드 없이 사각형끼리만 검사 (비용이 공장 면적이 아닌 설비 수에 비례)
+    if not layout_is_feasible(chromosome, problem):
         return result # 기본 유효하지 않음 결과 반환
 
-    total_dist = calculate_total_distance(machine_positions, process_seq_ids)
-    throughput = estimate_line_throughput(machine_positions, process_seq_ids, machines_definitions, material_travel_speed)
+    return _score_layout(chromosome, problem, result)
+
+def _score_layout(chromosome, problem, result):
+    edge_distances = layout_edge_distances(chromosome, problem) if problem.num_machines > 1 else None
+    total_dist = calculate_total_distance(chromosome, problem, edge_distances)
+    throughput = estimate_line_throughput(chromosome, problem, edge_distances)
 
     if total_dist == float('inf') or throughput == 0.0: # 계산 오류 시 유효하지 않음 처리
         return result
 
     fitness_val = (FITNESS_THROUGHPUT_WEIGHT * throughput) - (FITNESS_DISTANCE_WEIGHT * total_dist)
-    if throughput >= target_prod_throughput: fitness_val += throughput * BONUS_FOR_TARGET_ACHIEVEMENT_FACTOR
+    if throughput >= problem.target_prod_throughput: fitness_val += throughput * BONUS_FOR_TARGET_ACHIEVEMENT_FACTOR
     
     result["fitness"] = fitness_val
     result["distance"] = total_dist
@@ -313,150 +781,1430 @@ def calculate_fitness(chromosome, machines_defs_ordered_by_proc_seq, process_seq
     result["is_valid"] = True
     return result
 
-def selection(population_with_eval_results, tournament_size): # 입력 변경
-    if not population_with_eval_results: return None
-    actual_tournament_size = min(tournament_size, len(population_with_eval_results))
-    if actual_tournament_size == 0: return None
-    tournament = random.sample(population_with_eval_results, actual_tournament_size)
-    winner = max(tournament, key=lambda item: item[1]['fitness']) # item[1] is a dict
-    return winner[0] # Return chromosome
-
-def crossover(parent1_chromo, parent2_chromo, crossover_rate):
-    child1, child2 = list(parent1_chromo), list(parent2_chromo)
-    if random.random() < crossover_rate:
-        num_genes = len(parent1_chromo)
-        if num_genes > 1:
-            cut_point = random.randint(1, num_genes - 1)
-            child1 = parent1_chromo[:cut_point] + parent2_chromo[cut_point:]
-            child2 = parent2_chromo[:cut_point] + parent1_chromo[cut_point:]
-    return child1, child2
-
-def mutate(chromosome, machines_in_proc_order_defs, factory_w, factory_h, mutation_rate_per_gene=0.1):
-    mutated_chromosome = list(chromosome)
+def layout_is_feasible(chromosome, problem):
+    """
+    염색체 하나의 배치 유효성을 사각형 교차 검사만으로 판정합니다 (calculate_fitness의 순차 배치 검사와 같은 판정).
+    설비 수가 FEASIBILITY_SWEEP_THRESHOLD 이하면 N×N 쌍을 한 번에 검사하고(population_validity),
+    그보다 많으면 x축 스윕으로 x 구간이 겹치는 쌍만 골라 검사합니다.
+    """
+    positions = np.asarray(chromosome, dtype=np.int64).reshape(-1, 2)
+    if len(positions) != problem.num_machines: return False
+    return bool(population_validity(positions[None], problem)[0])
+
+def _layout_is_feasible_sweep(positions, problem):
+    """
+    스윕 라인 판정: 설비 몸체를 x 시작점으로 정렬해 두고, 설비 j의 클리어런스 포함 영역마다
+    x 구간이 겹칠 수 있는 몸체만 이분 탐색으로 잘라내 y 구간과 배치 순서(i < j)를 확인합니다.
+    후보 수를 K라 하면 O(N log N + K)입니다.
+    """
+    body_start = positions
+    body_end = positions + problem.footprints
+    if (body_start < 0).any() or (body_end > np.array([problem.factory_w, problem.factory_h])).any():
+        return False
+    clearances = problem.clearances[:, None]
+    inflated_start = body_start - clearances
+    inflated_end = body_end + clearances
+
+    order = np.argsort(body_start[:, 0], kind="stable")
+    sorted_x_start = body_start[order, 0]
+    max_width = int(problem.footprints[:, 0].max())
+    for j in range(problem.num_machines):
+        # body_x_start < inflated_x_end 이고 body_x_end(<= body_x_start + max_width) > inflated_x_start 인 후보 창
+        lo = np.searchsorted(sorted_x_start, inflated_start[j, 0] - max_width, side="right")
+        hi = np.searchsorted(sorted_x_start, inflated_end[j, 0], side="left")
+        if lo >= hi: continue
+        candidates = order[lo:hi]
+        candidates = candidates[candidates < j] # 앞서 놓인 설비의 몸체만 검사
+        if candidates.size == 0: continue
+        overlaps = ((body_start[candidates] < inflated_end[j]) & (inflated_start[j] < body_end[candidates])).all(axis=1)
+        if overlaps.any(): return False
+    return True
+
+def population_validity(population_array, problem):
+    """
+    (pop, n_machines, 2) 배열의 개체별 배치 유효성을 판정합니다 (calculate_fitness의 순차 배치 검사와 같은 판정).
+    설비 수가 FEASIBILITY_SWEEP_THRESHOLD 이하면 개체 블록마다 N×N 쌍을 한 번에 검사하고 (블록 크기는
+    FEASIBILITY_BLOCK_PAIRS로 제한하므로 메모리가 집단 크기에 비례해 늘지 않음), 그보다 많으면 개체마다 스윕 라인으로 검사합니다.
+
+    Returns:
+        np.ndarray: 길이 pop의 bool 배열
+    """
+    positions = np.asarray(population_array, dtype=np.int64).reshape(-1, problem.num_machines, 2)
+    if problem.num_machines > FEASIBILITY_SWEEP_THRESHOLD:
+        return np.array([_layout_is_feasible_sweep(layout, problem) for layout in positions], dtype=bool)
+    block_size = max(1, FEASIBILITY_BLOCK_PAIRS // max(problem.num_machines**2, 1))
+    if len(positions) <= block_size: return _population_validity_pairwise(positions, problem)
+    return np.concatenate([_population_validity_pairwise(positions[start:start + block_size], problem)
+                           for start in range(0, len(positions), block_size)])
+
+def _population_validity_pairwise(positions, problem):
+    """경계 검사 + 뒤에 놓인 설비 j의 클리어런스 영역이 앞선 설비 i의 몸체와 겹치는지 (i < j)를 모든 쌍에 대해 검사합니다."""
+    footprints = problem.footprints # (n, 2)
+    clearances = problem.clearances[:, None] # (n, 1)
+    body_start = positions
+    body_end = positions + footprints
+    in_bounds = ((body_start >= 0) & (body_end <= np.array([problem.factory_w, problem.factory_h]))).all(axis=(1, 2))
+    inflated_start = body_start - clearances
+    inflated_end = body_end + clearances
+    overlaps = ((body_start[:, :, None, :] < inflated_end[:, None, :, :]) &
+                (inflated_start[:, None, :, :] < body_end[:, :, None, :])).all(axis=3) # overlaps[p, i, j]
+    earlier_pairs = np.triu(np.ones((problem.num_machines,) * 2, dtype=bool), k=1)
+    return in_bounds & ~(overlaps & earlier_pairs).any(axis=(1, 2))
+
+def calculate_population_fitness(population_array, problem, fitness_threshold=None):
+    """
+    집단 전체를 (pop, n_machines, 2) 정수 배열로 받아 한 번에 평가합니다.
+    calculate_fitness를 개체마다 호출한 것과 같은 값을 배열로 돌려줍니다.
+
+    Args:
+        population_array: population_array[p, i] = p번째 개체의 i번째 유전자 (x, y)
+        fitness_threshold: 통로 거리 방식의 조기 중단 문턱 (evaluate_generation이 세대 전체에서 정한 값).
+                           주어지면 적합도가 문턱 아래인 유효 개체는 계산을 멈추고 고정값(-inf, inf, 0)으로 둡니다
+
+    Returns:
+        dict: {"fitness", "distance", "throughput", "is_valid"} 각각 길이 pop의 np.ndarray.
+              통로 거리 방식이면 조기 중단한 개체 표시 "cut_off"가 추가됩니다 (유효하지만 점수를 매기지 않은 개체)
+    """
+    positions = np.asarray(population_array, dtype=np.int64).reshape(-1, problem.num_machines, 2)
+    pop_size = positions.shape[0]
+    if _profiler is not None: _profiler.counts["evaluated_individuals"] += pop_size
+
+    result = {"fitness": np.full(pop_size, -float('inf')), "distance": np.full(pop_size, float('inf')),
+              "throughput": np.zeros(pop_size), "is_valid": np.zeros(pop_size, dtype=bool)}
+    if problem.num_machines < 2:
+        return result
+
+    # 1. 유효성: 경계 검사 + 뒤에 놓인 설비 j의 클리어런스 영역이 앞선 설비 i의 몸체와 겹치는지 (i < j)
+    is_valid = population_validity(positions, problem)
+
+    # 2. 공정 순서에 따른 간선 거리 (중심점 간 직선 거리 또는 통로 거리)
+    cut_off = None
+    if uses_aisle_distance():
+        edge_distances, cut_off = _population_aisle_edge_distances(positions, is_valid, problem, fitness_threshold)
+    else:
+        centers = positions + problem.half_extents # (pop, n, 2)
+        deltas = centers[:, problem.edge_genes[:, 1], :] - centers[:, problem.edge_genes[:, 0], :]
+        edge_distances = np.sqrt(deltas[:, :, 0]**2 + deltas[:, :, 1]**2)
+    total_dist, throughput, fitness_val = _population_scores(edge_distances, problem)
+
+    is_valid &= (total_dist != float('inf')) & (throughput != 0.0)
+    result["fitness"][is_valid] = fitness_val[is_valid]
+    result["distance"][is_valid] = total_dist[is_valid]
+    result["throughput"][is_valid] = throughput[is_valid]
+    result["is_valid"] = is_valid
+    if cut_off is not None:
+        if fitness_threshold is not None: cut_off |= result["fitness"] < fitness_threshold # 끝까지 계산했지만 문턱 아래인 개체
+        result["cut_off"] = cut_off & is_valid
+        _apply_aisle_cutoff(result)
+    return result
+
+def _apply_aisle_cutoff(result):
+    """조기 중단 개체(result["cut_off"])의 적합도/거리/생산량을 고정값으로 바꿉니다 (유효 여부는 그대로)."""
+    cut_off = result["cut_off"]
+    result["fitness"][cut_off] = -float('inf')
+    result["distance"][cut_off] = float('inf')
+    result["throughput"][cut_off] = 0.0
+
+def _population_scores(edge_distances, problem):
+    """(pop, 간선 수) 간선 거리로 총 거리, 단계별 시간에 따른 생산량, 적합도를 계산합니다 (calculate_fitness와 같은 식)."""
+    pop_size = edge_distances.shape[0]
+    total_dist = np.cumsum(edge_distances, axis=1)[:, -1] # 순차 누적 (calculate_total_distance와 동일한 합산 순서)
+
+    cycle_times = problem.seq_cycle_times
+    if problem.material_travel_speed > 0: travel_times = edge_distances / problem.material_travel_speed
+    else: travel_times = np.full_like(edge_distances, float('inf'))
+    stage_times = np.empty((pop_size, len(cycle_times)))
+    stage_times[:, 0] = cycle_times[0]
+    stage_times[:, 1:] = cycle_times[1:] + travel_times
+    max_stage_time = stage_times.max(axis=1)
+    computable = (max_stage_time > 0) & (max_stage_time != float('inf'))
+    throughput = np.where(computable, SECONDS_PER_HOUR / np.where(computable, max_stage_time, 1.0), 0.0)
+
+    # 적합도 (calculate_fitness와 같은 식)
+    fitness_val = (FITNESS_THROUGHPUT_WEIGHT * throughput) - (FITNESS_DISTANCE_WEIGHT * total_dist)
+    fitness_val = np.where(throughput >= problem.target_prod_throughput, fitness_val + throughput * BONUS_FOR_TARGET_ACHIEVEMENT_FACTOR, fitness_val)
+    return total_dist, throughput, fitness_val
+
+def _population_aisle_edge_distances(positions, is_valid, problem, fitness_threshold=None):
+    """
+    집단의 통로 거리 간선 배열 (pop, 간선 수)과 조기 중단 여부 (pop,)를 구합니다.
+    fitness_threshold가 없으면 유효한 개체를 모두 정확히 계산합니다. 있으면 간선 하한으로 계산한 적합도 상한이
+    문턱에 못 미치는 개체는 계산하지 않고, 계산 중에도 총 거리가 문턱을 지킬 수 있는 한도를 넘으면 멈춥니다.
+    두 경우 모두 실제 적합도가 문턱 아래임이 확실하므로 개체별 결과가 집단을 나누는 방식과 무관합니다.
+    유효하지 않은 개체와 중단한 개체의 간선 값은 하한(또는 구한 거리 + 하한)입니다.
+    """
+    lower_bounds = aisle_lower_bounds(positions, problem) # (pop, 간선 수)
+    edge_distances = lower_bounds.copy()
+    cut_off = np.zeros(len(positions), dtype=bool)
+    valid_indices = np.flatnonzero(is_valid)
+    if valid_indices.size == 0: return edge_distances, cut_off
+    upper_fitness = _population_scores(lower_bounds, problem)[2] if fitness_threshold is not None else None
+    for idx in valid_indices:
+        max_total = None
+        if fitness_threshold is not None:
+            if upper_fitness[idx] < fitness_threshold:
+                cut_off[idx] = True
+                continue
+            if FITNESS_DISTANCE_WEIGHT > 0: # 적합도 >= 문턱을 유지할 수 있는 최대 총 거리
+                max_total = float(lower_bounds[idx].sum()) + (upper_fitness[idx] - fitness_threshold) / FITNESS_DISTANCE_WEIGHT
+        distances, complete = aisle_edge_distances(positions[idx], problem, max_total)
+        edge_distances[idx] = distances
+        if not complete: cut_off[idx] = True
+    return edge_distances, cut_off
+
+def aisle_cutoff_split(population_array, problem):
+    """
+    조기 중단 문턱을 정할 개체와 나머지 개체의 인덱스 (둘 다 오름차순).
+    문턱용 개체는 간선 하한으로 계산한 적합도 상한이 높은 순서(동점은 앞 개체)로 고른 유효 개체의 (1 - AISLE_CUTOFF_FRACTION) 몫입니다.
+    배치만으로 정해지므로 캐시 내용이나 병렬 조각 수와 무관합니다.
+    """
+    positions = np.asarray(population_array, dtype=np.int64).reshape(-1, problem.num_machines, 2)
+    valid_indices = np.flatnonzero(population_validity(positions, problem))
+    upper_fitness = _population_scores(aisle_lower_bounds(positions[valid_indices], problem), problem)[2]
+    num_exact = valid_indices.size - int(AISLE_CUTOFF_FRACTION * valid_indices.size)
+    exact_indices = np.sort(valid_indices[np.argsort(-upper_fitness, kind="stable")[:num_exact]])
+    return exact_indices, np.setdiff1d(np.arange(len(positions)), exact_indices)
+
+# --- 증분(델타) 적합도 평가 ---
+class IncrementalEvaluation:
+    """
+    한 염색체의 평가 상태(간선별 거리, 단계별 시간, 제약 위반 수)를 보관합니다.
+    move_genes로 일부 유전자를 옮기면 바뀐 유전자에 닿는 순서 간선(이전→설비, 설비→다음)과
+    해당 설비의 겹침/클리어런스 제약만 다시 계산하므로, 전체 calculate_fitness 없이 평가할 수 있습니다 (메메틱 국소 탐색에서 사용).
+    단계 시간의 최댓값은 세그먼트 트리로 관리해 갱신 시 O(log n)으로 유지합니다.
+    """
+    def __init__(self, chromosome, problem):
+        self.problem = problem # 통로 거리 방식에서 result()가 전체 배치로 다시 평가할 때 사용
+        self.footprints = problem.footprints.tolist() # 유전자별 (w, h), 파이썬 값으로 두어 쌍별 검사를 가볍게 유지
+        self.clearances = problem.clearances.tolist()
+        self.half_extents = problem.half_extents.tolist()
+        self.factory_w = problem.factory_w
+        self.factory_h = problem.factory_h
+        self.target_prod_throughput = problem.target_prod_throughput
+        self.material_travel_speed = problem.material_travel_speed
+        self.positions = [tuple(position) for position in np.asarray(chromosome).tolist()]
+        self.seq_genes = problem.seq_genes.tolist()
+        self.seq_index_of_gene = {g: k for k, g in enumerate(self.seq_genes)}
+        self.cycle_times = problem.seq_cycle_times.tolist()
+
+        # 순서 간선 k: seq_genes[k] -> seq_genes[k+1]
+        self.edge_distances = [self._edge_distance(k) for k in range(len(self.seq_genes) - 1)]
+        self.total_distance = sum(self.edge_distances)
+        self._tree_size = 1
+        while self._tree_size < max(len(self.seq_genes), 1): self._tree_size *= 2
+        self._stage_tree = [0.0] * (2 * self._tree_size)
+        for k in range(len(self.seq_genes)):
+            self._update_stage(k)
+
+        self.out_of_bounds_count = sum(not self._is_in_bounds(i) for i in range(len(self.positions)))
+        self.conflict_count = sum(self._conflicts(i, j) for j in range(len(self.positions)) for i in range(j))
+
+    def _center(self, g):
+        pos_x, pos_y = self.positions[g]
+        half_w, half_h = self.half_extents[g]
+        return pos_x + half_w, pos_y + half_h
+
+    def _edge_distance(self, k):
+        (x1, y1), (x2, y2) = self._center(self.seq_genes[k]), self._center(self.seq_genes[k + 1])
+        return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
+
+    def _stage_time(self, k):
+        if k == 0: return self.cycle_times[0]
+        if self.material_travel_speed <= 0: return float('inf')
+        return self.cycle_times[k] + self.edge_distances[k - 1] / self.material_travel_speed
+
+    def _update_stage(self, k):
+        node = self._tree_size + k
+        self._stage_tree[node] = self._stage_time(k)
+        node //= 2
+        while node >= 1:
+            self._stage_tree[node] = max(self._stage_tree[2 * node], self._stage_tree[2 * node + 1])
+            node //= 2
+
+    def _is_in_bounds(self, i):
+        pos_x, pos_y = self.positions[i]
+        m_width, m_height = self.footprints[i]
+        return 0 <= pos_x and pos_x + m_width <= self.factory_w and 0 <= pos_y and pos_y + m_height <= self.factory_h
+
+    def _conflicts(self, i, j):
+        """앞선 설비 i(i < j)의 몸체가 설비 j의 클리어런스 포함 영역과 겹치는지."""
+        (xi, yi), (xj, yj) = self.positions[i], self.positions[j]
+        wi, hi = self.footprints[i]
+        wj, hj = self.footprints[j]
+        cj = self.clearances[j]
+        return xi < xj + wj + cj and xj - cj < xi + wi and yi < yj + hj + cj and yj - cj < yi + hi
+
+    def _pair_conflicts(self, genes):
+        conflicts = 0
+        for g in genes:
+            for other in range(len(self.positions)):
+                if other == g or (other in genes and other < g): continue # 바뀐 유전자끼리의 쌍은 한 번만
+                conflicts += self._conflicts(min(g, other), max(g, other))
+        return conflicts
+
+    def move_genes(self, changes):
+        """
+        changes = [(유전자 인덱스, (x, y)), ...]를 제자리에서 적용합니다.
+
+        Returns:
+            list: 되돌리기용 [(유전자 인덱스, 이전 (x, y)), ...]
+        """
+        genes = {g for g, _ in changes}
+        previous = [(g, self.positions[g]) for g in genes]
+        old_out_of_bounds = sum(not self._is_in_bounds(g) for g in genes)
+        old_conflicts = self._pair_conflicts(genes)
+        for g, new_position in changes:
+            self.positions[g] = tuple(new_position)
+        self.out_of_bounds_count += sum(not self._is_in_bounds(g) for g in genes) - old_out_of_bounds
+        self.conflict_count += self._pair_conflicts(genes) - old_conflicts
+
+        touched_edges = set()
+        for g in genes:
+            k = self.seq_index_of_gene.get(g)
+            if k is None: continue
+            if k > 0: touched_edges.add(k - 1)
+            if k < len(self.seq_genes) - 1: touched_edges.add(k)
+        for e in touched_edges:
+            new_distance = self._edge_distance(e)
+            self.total_distance += new_distance - self.edge_distances[e]
+            self.edge_distances[e] = new_distance
+            self._update_stage(e + 1)
+        return previous
+
+    def result(self):
+        """
+        calculate_fitness와 같은 형식의 평가 결과 dict.
+        통로 거리 방식이면 설비 하나만 옮겨도 모든 간선의 경로가 달라질 수 있으므로 간선 거리는 배치 전체로 다시 구합니다 (캐시 사용).
+        """
+        result = {"fitness": -float('inf'), "distance": float('inf'), "throughput": 0.0, "is_valid": False}
+        if self.out_of_bounds_count > 0 or self.conflict_count > 0 or len(self.seq_genes) < 2:
+            return result
+        if uses_aisle_distance(): return _score_layout(self.positions, self.problem, result)
+        max_stage_time = self._stage_tree[1]
+        if max_stage_time <= 0 or max_stage_time == float('inf'): return result
+        throughput = SECONDS_PER_HOUR / max_stage_time
+        fitness_val = (FITNESS_THROUGHPUT_WEIGHT * throughput) - (FITNESS_DISTANCE_WEIGHT * self.total_distance)
+        if throughput >= self.target_prod_throughput: fitness_val += throughput * BONUS_FOR_TARGET_ACHIEVEMENT_FACTOR
+        result["fitness"] = fitness_val
+        result["distance"] = self.total_distance
+        result["throughput"] = throughput
+        result["is_valid"] = True
+        return result
+
+# --- 프로세스 풀 병렬 평가 ---
+_worker_problem = None # 워커 프로세스별 문제 정의 (초기화 시 한 번만 전달됨)
+
+def _init_eval_worker(problem, hyperparameters=None):
+    """
+    워커 초기화: 문제 정의(ProblemInstance)를 한 번만 받아 두고, CTRL+C는 메인 프로세스(signal_handler)에만 맡깁니다.
+    hyperparameters가 주어지면 메인 프로세스의 설정값(run_ga config, 체크포인트 복원값)을 그대로 적용하므로
+    spawn/forkserver 방식으로 시작된 워커도 같은 설정으로 진화합니다.
+    """
+    global _worker_problem, _profiler
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_problem = problem
+    if hyperparameters: globals().update(hyperparameters)
+    _profiler = None # fork로 물려받은 메인 프로세스의 프로파일러는 쓰지 않음 (병렬 평가의 개체 수는 메인에서 한 번만 집계)
+
+def _evaluate_population_chunk(population_chunk, fitness_threshold=None):
+    return calculate_population_fitness(population_chunk, _worker_problem, fitness_threshold)
+
+def create_eval_executor(num_workers, problem):
+    """문제 정의를 initargs로 한 번만 전달하는 병렬 평가용 ProcessPoolExecutor를 만듭니다."""
+    return ProcessPoolExecutor(max_workers=num_workers, initializer=_init_eval_worker, initargs=(problem, current_config()))
+
+def calculate_population_fitness_parallel(executor, population_array, num_chunks, fitness_threshold=None):
+    """
+    집단 배열을 num_chunks개 조각으로 나눠 워커에서 평가한 뒤 원래 순서대로 합칩니다.
+    평가는 난수를 사용하지 않고 조기 중단 문턱(fitness_threshold)도 모든 조각에 같은 값을 넘기므로
+    같은 시드에서 직렬 평가와 동일한 결과를 냅니다.
+    """
+    if _profiler is not None: _profiler.counts["evaluated_individuals"] += len(population_array) # 워커에는 프로파일러가 없어 여기서 한 번만 집계
+    chunks = np.array_split(np.asarray(population_array), max(1, min(num_chunks, len(population_array))))
+    chunk_results = list(executor.map(_evaluate_population_chunk, chunks, [fitness_threshold] * len(chunks)))
+    return {key: np.concatenate([chunk_result[key] for chunk_result in chunk_results]) for key in chunk_results[0]}
+
+# --- 적합도 캐시 (LRU) ---
+class FitnessCache:
+    """
+    염색체 -> 평가 결과를 보관하는 크기 제한 LRU 캐시입니다.
+    키는 염색체 좌표를 int16 배열로 만든 바이트열(설비당 4바이트)이라 충돌 없이 작게 유지됩니다.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (fitness, distance, throughput, is_valid)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(chromosome):
+        return np.asarray(chromosome, dtype=np.int16).tobytes()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False) # 가장 오래 사용되지 않은 항목 제거
+
+    def evaluate_population(self, population_array, evaluate_batch):
+        """
+        캐시에 없는 개체만 모아 evaluate_batch(배열 -> calculate_population_fitness 형식 dict)로 평가하고,
+        전체 집단에 대한 결과를 calculate_population_fitness와 같은 형식으로 돌려줍니다.
+        같은 세대 안의 중복 개체는 한 번만 평가하며 적중으로 집계합니다.
+        """
+        population_array = np.asarray(population_array)
+        pop_size = population_array.shape[0]
+        result = {"fitness": np.empty(pop_size), "distance": np.empty(pop_size),
+                  "throughput": np.empty(pop_size), "is_valid": np.empty(pop_size, dtype=bool)}
+        pending = OrderedDict() # 평가할 key -> 해당 key를 가진 개체 인덱스 목록
+        for idx, key in enumerate(self.make_key(chromo) for chromo in population_array):
+            if key in pending:
+                pending[key].append(idx); self.hits += 1; continue
+            entry = self.get(key)
+            if entry is None: pending[key] = [idx]
+            else: result["fitness"][idx], result["distance"][idx], result["throughput"][idx], result["is_valid"][idx] = entry
+        if pending:
+            miss_eval = evaluate_batch(population_array[[indices[0] for indices in pending.values()]])
+            cut_off = miss_eval.get("cut_off") # 통로 거리 조기 중단 개체는 세대 문턱에 따른 고정값이므로 캐시하지 않음
+            for miss_idx, (key, indices) in enumerate(pending.items()):
+                entry = (miss_eval["fitness"][miss_idx], miss_eval["distance"][miss_idx],
+                         miss_eval["throughput"][miss_idx], miss_eval["is_valid"][miss_idx])
+                if cut_off is None or not cut_off[miss_idx]: self.put(key, entry)
+                for idx in indices:
+                    result["fitness"][idx], result["distance"][idx], result["throughput"][idx], result["is_valid"][idx] = entry
+        return result
+
+def evaluate_generation(population_array, problem, evaluate_batch, fitness_cache=None):
+    """
+    세대 전체를 평가합니다 (fitness_cache가 있으면 캐시에 없는 개체만 evaluate_batch로 평가).
+    통로 거리 방식이고 AISLE_CUTOFF_FRACTION > 0이면 aisle_cutoff_split의 문턱용 개체를 먼저 정확히 평가해
+    그 최저 적합도를 세대의 조기 중단 문턱으로 정하고, 나머지 개체는 같은 문턱으로 평가합니다.
+    문턱 아래인 유효 개체는 캐시 적중 여부와 관계없이 모두 조기 중단 고정값이 되므로,
+    결과가 캐시 내용이나 병렬 조각 수와 무관하게 직렬 평가와 같습니다.
+
+    Args:
+        evaluate_batch: (배열, fitness_threshold=None) -> calculate_population_fitness 형식 dict
+
+    Returns:
+        dict: calculate_population_fitness 형식 (통로 거리 방식이면 "cut_off" 포함)
+    """
+    def evaluate(subset, fitness_threshold=None):
+        batch = evaluate_batch if fitness_threshold is None else (lambda array: evaluate_batch(array, fitness_threshold))
+        return fitness_cache.evaluate_population(subset, batch) if fitness_cache is not None else batch(subset)
+
+    if not uses_aisle_distance() or AISLE_CUTOFF_FRACTION <= 0 or problem.num_machines < 2:
+        return evaluate(population_array)
+    population_array = np.asarray(population_array)
+    exact_indices, remaining_indices = aisle_cutoff_split(population_array, problem)
+    exact_eval = evaluate(population_array[exact_indices])
+    exact_fitness = exact_eval["fitness"][exact_eval["is_valid"]]
+    threshold = float(exact_fitness.min()) if exact_fitness.size > 0 else None
+
+    pop_size = len(population_array)
+    result = {"fitness": np.empty(pop_size), "distance": np.empty(pop_size),
+              "throughput": np.empty(pop_size), "is_valid": np.empty(pop_size, dtype=bool)}
+    partial_evals = [(exact_indices, exact_eval)]
+    if remaining_indices.size > 0: partial_evals.append((remaining_indices, evaluate(population_array[remaining_indices], threshold)))
+    for indices, partial_eval in partial_evals:
+        for key in result: result[key][indices] = partial_eval[key]
+    result["cut_off"] = result["is_valid"] & (result["fitness"] < threshold) if threshold is not None else np.zeros(pop_size, dtype=bool)
+    _apply_aisle_cutoff(result)
+    return result
+
+# --- 배열 기반 집단 (이중 버퍼) ---
+class PopulationBuffer:
+    """
+    집단을 (pop, n_machines, 2) int16 배열 두 개로 보관합니다 (개체당 설비 수 × 4바이트).
+    current 세대를 평가하는 동안 엘리트/교차/변이 결과를 next_generation에 바로 쓰고 swap()으로 맞바꾸므로
+    세대마다 개체별 리스트/튜플을 새로 만들지 않습니다.
+    """
+    def __init__(self, population):
+        self.current = np.array(population, dtype=np.int16)
+        self.next_generation = np.empty_like(self.current)
+
+    def __len__(self):
+        return len(self.current)
+
+    def swap(self):
+        self.current, self.next_generation = self.next_generation, self.current
+
+def selection(fitness_values, candidate_indices, num_winners, tournament_size, rng):
+    """
+    토너먼트 num_winners번을 한 번의 NumPy 추첨으로 진행합니다.
+    각 토너먼트는 candidate_indices에서 min(tournament_size, 후보 수)개를 비복원 추출해 (random.sample과 같음) 적합도가 가장 높은 개체를 고릅니다.
+
+    Args:
+        fitness_values: 길이 pop의 적합도 배열
+        candidate_indices: 부모 후보 인덱스 배열 (비어 있으면 안 됨)
+        rng: np.random.Generator
+
+    Returns:
+        np.ndarray: 길이 num_winners의 우승 개체 인덱스
+    """
+    candidate_indices = np.asarray(candidate_indices)
+    num_candidates = len(candidate_indices)
+    actual_tournament_size = min(max(tournament_size, 1), num_candidates)
+    if 2 * actual_tournament_size > num_candidates: # 후보가 적으면 행마다 무작위 순열의 앞부분
+        draws = np.argsort(rng.random((num_winners, num_candidates)), axis=1)[:, :actual_tournament_size]
+    else: # 후보가 많으면 복원 추출 후 중복이 있는 행만 다시 추첨
+        draws = rng.integers(0, num_candidates, size=(num_winners, actual_tournament_size))
+        while True:
+            sorted_draws = np.sort(draws, axis=1)
+            duplicate_rows = np.flatnonzero((sorted_draws[:, 1:] == sorted_draws[:, :-1]).any(axis=1))
+            if duplicate_rows.size == 0: break
+            draws[duplicate_rows] = rng.integers(0, num_candidates, size=(duplicate_rows.size, actual_tournament_size))
+    tournaments = candidate_indices[draws]
+    winners = np.argmax(np.asarray(fitness_values)[tournaments], axis=1)
+    return tournaments[np.arange(num_winners), winners]
+
+def crossover(parents1, parents2, crossover_rate, rng, children1_out, children2_out):
+    """
+    (m, n, 2) 부모 배열 두 개에 한 점 교차를 한꺼번에 적용해 children1_out, children2_out에 씁니다.
+    쌍마다 crossover_rate 확률로 교차하며, 절단점 이후 유전자를 서로 바꿉니다.
+    """
+    num_pairs, num_genes = parents1.shape[:2]
+    children1_out[:] = parents1
+    children2_out[:] = parents2
+    if num_genes < 2 or num_pairs == 0: return children1_out, children2_out
+    do_crossover = rng.random(num_pairs) < crossover_rate
+    cut_points = rng.integers(1, num_genes, size=num_pairs)
+    swap_mask = (np.arange(num_genes)[None, :] >= cut_points[:, None]) & do_crossover[:, None] # (m, n)
+    np.copyto(children1_out, parents2, where=swap_mask[:, :, None])
+    np.copyto(children2_out, parents1, where=swap_mask[:, :, None])
+    return children1_out, children2_out
+
+def mutation_masks(num_children, num_genes, mutation_rate, mutation_rate_per_gene, rng):
+    """자식별로 mutation_rate 확률로 변이 대상이 되고, 대상 자식의 유전자마다 mutation_rate_per_gene 확률로 옮길 유전자 마스크 (m, n)."""
+    mutated_children = rng.random(num_children) < mutation_rate
+    return (rng.random((num_children, num_genes)) < mutation_rate_per_gene) & mutated_children[:, None]
+
+def mutate(chromosome, problem, mutation_rate_per_gene=0.1, layout_state=None, gene_mask=None):
+    """
+    chromosome((n, 2) 정수 배열)을 제자리에서 변이시키고 돌려줍니다.
+    gene_mask(길이 n bool)가 주어지면 유전자별 난수 대신 마스크가 True인 유전자만 옮깁니다.
+    layout_state가 주어지면 (chromosome과 같은 배치를 담은 LayoutState) 그 상태를 제자리에서 갱신하고,
+    없으면 실제로 옮길 유전자가 처음 뽑힐 때 한 번만 만듭니다.
+    """
     num_genes = len(chromosome)
-    if num_genes == 0: return mutated_chromosome
     for i in range(num_genes):
-        if random.random() < mutation_rate_per_gene:
-            machine_def_to_mutate = machines_in_proc_order_defs[i]
-            m_footprint, m_clearance = machine_def_to_mutate["footprint"], machine_def_to_mutate.get("clearance", 0)
-            temp_grid = initialize_layout_grid(factory_w, factory_h)
-            for k in range(num_genes):
-                if k == i: continue
-                prev_pos_x, prev_pos_y = mutated_chromosome[k]
-                if prev_pos_x == -1 and prev_pos_y == -1: continue
-                other_machine_def = machines_in_proc_order_defs[k]
-                place_machine_on_grid(temp_grid, other_machine_def["id"], other_machine_def["footprint"], prev_pos_x, prev_pos_y)
-            valid_new_placements = []
-            for x_coord in range(factory_w - m_footprint[0] + 1):
-                for y_coord in range(factory_h - m_footprint[1] + 1):
-                    if can_place_machine(temp_grid, m_footprint, m_clearance, x_coord, y_coord, factory_w, factory_h):
-                        valid_new_placements.append((x_coord,y_coord))
-            if valid_new_placements: mutated_chromosome[i] = random.choice(valid_new_placements)
-    return mutated_chromosome
+        if (gene_mask[i] if gene_mask is not None else random.random() < mutation_rate_per_gene):
+            if layout_state is None: layout_state = LayoutState(problem, chromosome)
+            prev_position = layout_state.positions[i]
+            layout_state.remove_machine(i) # 자기 자신을 제외한 나머지 설비만 점유한 상태
+            new_position = layout_state.engine.sample_position(layout_state.footprints[i], layout_state.clearances[i])
+            if new_position is None: new_position = prev_position
+            layout_state.place_machine(i, *new_position)
+            chromosome[i] = new_position
+    return chromosome
 
-# --- 메인 실행 블록 ---
-if __name__ == '__main__':
-    print("공장 레이아웃 최적화 (유전 알고리즘 버전) - 추가 분석 포함")
-    signal.signal(signal.SIGINT, signal_handler)
+def population_diversity(population_array, problem):
+    """
+    유전자(설비)별 위치가 집단 안에서 얼마나 퍼져 있는지를 0~1 값으로 나타냅니다.
+    각 설비 위치의 평균 위치로부터의 RMS 거리를 공장 대각선 길이로 나눈 값의 평균이며,
+    0이면 모든 개체가 같은 배치로 수렴한 상태입니다.
+    """
+    positions = np.asarray(population_array, dtype=float)
+    if positions.shape[0] == 0: return 0.0
+    spread = np.sqrt(positions.var(axis=0).sum(axis=-1)) # (n_machines,)
+    return float(spread.mean() / math.hypot(problem.factory_w, problem.factory_h))
+
+def repair_chromosome(chromosome, problem, layout_state=None):
+    """
+    calculate_fitness와 같은 순서로 설비를 하나씩 배치하면서, 앞선 설비들과 겹치거나 클리어런스를 위반하는
+    설비만 배치 마스크에서 현재 위치와 가장 가까운 배치 가능 위치로 옮깁니다 (동일 거리 후보는 무작위).
+    미배치 유전자 (-1, -1)은 무작위 배치 가능 위치에 놓고, 놓을 곳이 없는 설비는 그대로 둡니다.
+    chromosome((n, 2) 정수 배열)은 제자리에서 고쳐집니다.
+    layout_state가 주어지면 (담긴 배치는 버림) 새로 만드는 대신 그 점유 상태를 비워 쓰며, 끝나면 수리된 배치를 담고 있습니다.
+
+    Returns:
+        np.ndarray: 수리된 염색체 (chromosome 자신)
+    """
+    current_positions = chromosome.tolist()
+    if layout_state is None: layout_state = LayoutState(problem)
+    layout_state.clear() # 앞선(이미 확정된) 설비만 점유하도록 비운 뒤 순서대로 채움
+    engine = layout_state.engine
+    unplaced = []
+    for j, (m_footprint, m_clearance) in enumerate(zip(layout_state.footprints, layout_state.clearances)):
+        pos_x, pos_y = current_positions[j]
+        if engine.can_place(m_footprint, m_clearance, pos_x, pos_y):
+            layout_state.place_machine(j, pos_x, pos_y)
+            continue
+
+        if (pos_x, pos_y) == (-1, -1):
+            new_position = engine.sample_position(m_footprint, m_clearance)
+        else:
+            cand_x, cand_y = engine.candidate_positions(m_footprint, m_clearance)
+            new_position = None
+            if cand_x.size > 0:
+                squared_dist = (cand_x - pos_x)**2 + (cand_y - pos_y)**2
+                nearest = int(random.choice(np.flatnonzero(squared_dist == squared_dist.min())))
+                new_position = (int(cand_x[nearest]), int(cand_y[nearest]))
+        if new_position is None: # 배치 가능한 곳이 없음 (유효하지 않은 채로 남음)
+            unplaced.append(j)
+            continue
+        chromosome[j] = new_position
+        layout_state.place_machine(j, *new_position)
+    for j in unplaced: # 이후 설비의 배치 판정에는 빠지도록 마지막에 원래 위치로 상태에 반영
+        layout_state.place_machine(j, *current_positions[j])
+    return chromosome
+
+# --- 메메틱 국소 탐색 (엘리트 다듬기) ---
+def _local_search_moves(evaluation, footprint_groups):
+    """
+    현재 배치에서 시도할 이동 후보 목록. 각 후보는 move_genes에 넘길 [(유전자 인덱스, (x, y)), ...]입니다.
+    - 한 칸 이동: 설비 하나를 상하좌우로 1칸
+    - 이웃 쪽 밀기: 설비 하나를 공정 순서상 이전/다음 설비 중심 방향으로 1칸 (대각선 포함)
+    - 맞바꾸기: 크기(footprint)가 같은 두 설비의 위치 교환
+    """
+    moves = []
+    seq_genes = evaluation.seq_genes
+    for g, (pos_x, pos_y) in enumerate(evaluation.positions):
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            moves.append([(g, (pos_x + dx, pos_y + dy))])
+        k = evaluation.seq_index_of_gene.get(g)
+        if k is None: continue
+        center_x, center_y = evaluation._center(g)
+        for neighbour_k in (k - 1, k + 1):
+            if not 0 <= neighbour_k < len(seq_genes): continue
+            neighbour_x, neighbour_y = evaluation._center(seq_genes[neighbour_k])
+            step_x = (neighbour_x > center_x) - (neighbour_x < center_x)
+            step_y = (neighbour_y > center_y) - (neighbour_y < center_y)
+            if (step_x, step_y) != (0, 0) and abs(step_x) + abs(step_y) == 2: # 축 방향 1칸은 위에서 이미 시도
+                moves.append([(g, (pos_x + step_x, pos_y + step_y))])
+    for genes in footprint_groups:
+        for a in range(len(genes)):
+            for b in range(a + 1, len(genes)):
+                g1, g2 = genes[a], genes[b]
+                moves.append([(g1, evaluation.positions[g2]), (g2, evaluation.positions[g1])])
+    return moves
+
+def local_search_chromosome(chromosome, problem, max_moves=None, deadline=None):
+    """
+    유효한 염색체 하나를 최초 개선(first-improvement) 언덕 오르기로 다듬습니다.
+    이동 후보를 무작위 순서로 시도해 적합도가 오르면 채택하고 후보 목록을 새로 만들며,
+    오르지 않으면 되돌립니다. 각 이동은 IncrementalEvaluation으로 바뀐 설비만 다시 평가합니다.
+
+    Args:
+        max_moves: 시도할 최대 이동 수 (None이면 MEMETIC_MAX_MOVES)
+        deadline: time.perf_counter() 기준 마감 시각 (None이면 시간 제한 없음)
+
+    Returns:
+        tuple: (다듬은 염색체, 평가 결과 dict). 시작 염색체가 유효하지 않으면 그대로 돌려줍니다.
+    """
+    if max_moves is None: max_moves = MEMETIC_MAX_MOVES
+    evaluation = IncrementalEvaluation(chromosome, problem)
+    current_result = evaluation.result()
+    if not current_result["is_valid"]: return list(chromosome), current_result
+
+    genes_by_footprint = {}
+    for g, m_footprint in enumerate(evaluation.footprints):
+        genes_by_footprint.setdefault(tuple(m_footprint), []).append(g)
+    footprint_groups = [genes for genes in genes_by_footprint.values() if len(genes) > 1]
+
+    moves_tried = 0
+    improved = True
+    while improved:
+        improved = False
+        candidate_moves = _local_search_moves(evaluation, footprint_groups)
+        random.shuffle(candidate_moves)
+        for changes in candidate_moves:
+            if moves_tried >= max_moves or (deadline is not None and time.perf_counter() >= deadline):
+                return list(evaluation.positions), current_result
+            moves_tried += 1
+            previous = evaluation.move_genes(changes)
+            move_result = evaluation.result()
+            if move_result["is_valid"] and move_result["fitness"] > current_result["fitness"]:
+                current_result = move_result
+                improved = True
+                break
+            evaluation.move_genes(previous) # 되돌리기
+    return list(evaluation.positions), current_result
+
+def breed_next_generation(population_array, fitness_values, valid_flags, elite_indices, problem, next_array,
+                          mutation_rate, crossover_rate, mutation_rate_per_gene, rng):
+    """
+    세대 진행 단계: 평가가 끝난 population_array로부터 다음 세대를 next_array에 씁니다.
+    엘리트 복사 -> 전체 토너먼트 한 번에 추첨 -> 부모 배치 전체에 한 점 교차 -> 변이 마스크 순으로 배열 연산으로 처리하고,
+    실제로 옮길 유전자가 있는 자식만 mutate, (REPAIR_OFFSPRING이면) 유효하지 않은 자식만 repair_chromosome을 거칩니다.
+
+    Args:
+        fitness_values, valid_flags: 길이 pop의 적합도 / 유효 여부 배열
+        elite_indices: 그대로 복사할 개체 인덱스 (적합도 내림차순)
+        rng: np.random.Generator (선택/교차/변이 마스크 추첨용)
+    """
+    population_size, num_genes = population_array.shape[:2]
+    num_elites = len(elite_indices)
+    next_array[:num_elites] = population_array[elite_indices]
+    num_children = population_size - num_elites
+    if num_children <= 0: return next_array
+
+    with profile_phase("selection"):
+        candidate_indices = np.flatnonzero(valid_flags)
+        if candidate_indices.size == 0: candidate_indices = np.arange(population_size) # 최악의 경우
+        num_pairs = (num_children + 1) // 2
+        parent_indices = selection(fitness_values, candidate_indices, 2 * num_pairs, TOURNAMENT_SIZE, rng)
+    with profile_phase("crossover"):
+        children1 = next_array[num_elites:num_elites + num_pairs]
+        children2 = np.empty((num_pairs, num_genes, 2), dtype=next_array.dtype)
+        crossover(population_array[parent_indices[:num_pairs]], population_array[parent_indices[num_pairs:]], crossover_rate, rng,
+                  children1, children2)
+        next_array[num_elites + num_pairs:] = children2[:num_children - num_pairs] # 자식 수가 홀수면 마지막 두 번째 자식은 버림
+
+    children = next_array[num_elites:]
+    layout_state = LayoutState(problem) # mutate/repair가 함께 쓰는 점유 상태. 세대마다 한 번만 만들고 자식마다 다시 채움
+    with profile_phase("mutation"):
+        gene_masks = mutation_masks(num_children, num_genes, mutation_rate, mutation_rate_per_gene, rng)
+        for child_idx in np.flatnonzero(gene_masks.any(axis=1)):
+            layout_state.load(children[child_idx])
+            mutate(children[child_idx], problem, layout_state=layout_state, gene_mask=gene_masks[child_idx])
+    if REPAIR_OFFSPRING:
+        with profile_phase("repair"):
+            for child_idx in np.flatnonzero(~population_validity(children, problem)):
+                repair_chromosome(children[child_idx], problem, layout_state)
+    return next_array
+
+def evolve_generation(population_buffer, problem, evaluate_batch, fitness_cache=None, mutation_rate=None, crossover_rate=None,
+                      mutation_rate_per_gene=None, local_search=None):
+    """
+    한 세대를 진행합니다: 집단 평가 -> 세대 통계 -> 엘리트 보존 + 선택/교차/변이로 다음 세대 생성.
+    population_buffer.current를 평가하고 다음 세대를 population_buffer.next_generation에 쓴 뒤 swap()합니다.
+
+    Args:
+        population_buffer: PopulationBuffer
+        evaluate_batch: (pop, n, 2) 배열과 조기 중단 문턱(fitness_threshold=None)을 받아 calculate_population_fitness 형식 dict를 돌려주는 함수
+        fitness_cache: FitnessCache (None이면 캐시 없이 평가)
+        mutation_rate, crossover_rate, mutation_rate_per_gene: 연산자 비율 (None이면 MUTATION_RATE 등 전역 설정값)
+        local_search: (염색체, 마감 시각) -> (다듬은 염색체, 평가 결과 dict) 함수. 주어지고 MEMETIC_ELITE_COUNT > 0이면
+                      평가 직후 상위 개체를 다듬어 통계·엘리트·부모 선택에 반영합니다 (None이면 국소 탐색 없음)
+
+    Returns:
+        dict: 세대 통계 (집단이 비어 있으면 None)
+    """
+    population_array = population_buffer.current
+    population_size = len(population_array)
+    if population_size == 0: return None
+    if mutation_rate is None: mutation_rate = MUTATION_RATE
+    if crossover_rate is None: crossover_rate = CROSSOVER_RATE
+    if mutation_rate_per_gene is None: mutation_rate_per_gene = MUTATION_RATE_PER_GENE
+
+    # 집단 전체를 배열로 한 번에 평가 (병렬 모드면 조각별로 워커에서, 캐시에 있는 개체는 평가 생략)
+    with profile_phase("evaluation"):
+        if fitness_cache is not None: cache_hits_before, cache_misses_before = fitness_cache.hits, fitness_cache.misses
+        population_eval = evaluate_generation(population_array, problem, evaluate_batch, fitness_cache)
+    fitness_values = population_eval["fitness"]
+    valid_flags = population_eval["is_valid"]
+    scored_flags = valid_flags & ~population_eval["cut_off"] if "cut_off" in population_eval else valid_flags # 조기 중단 개체 제외
+    with profile_phase("ranking"):
+        ranked_indices = np.argsort(-fitness_values, kind="stable") # 적합도 내림차순 (동점은 원래 순서)
+
+    # 메메틱 단계: 상위 개체를 세대당 시간 예산 안에서 국소 탐색으로 다듬음
+    memetic_improvements = 0
+    if local_search is not None and MEMETIC_ELITE_COUNT > 0:
+        with profile_phase("local_search"):
+            deadline = time.perf_counter() + MEMETIC_TIME_BUDGET_SECONDS if MEMETIC_TIME_BUDGET_SECONDS > 0 else None
+            for idx in ranked_indices[:MEMETIC_ELITE_COUNT]:
+                if not scored_flags[idx]: break
+                if deadline is not None and time.perf_counter() >= deadline: break
+                refined_chromo, refined_eval = local_search(population_array[idx], deadline)
+                if refined_eval["fitness"] <= fitness_values[idx]: continue
+                population_array[idx] = refined_chromo
+                for key in ("fitness", "distance", "throughput"): population_eval[key][idx] = refined_eval[key]
+                memetic_improvements += 1
+            if memetic_improvements: ranked_indices = np.argsort(-fitness_values, kind="stable")
+    current_gen_valid_individuals_count = int(valid_flags.sum())
+    current_gen_scored_count = int(scored_flags.sum())
+    current_gen_total_fitness = float(fitness_values[scored_flags].sum()) # 평균 적합도는 조기 중단 개체를 뺀 값
+    with profile_phase("statistics"):
+        diversity = population_diversity(population_array, problem)
+
+    # 현재 세대 최고 개체 정보
+    best_idx = int(np.argmax(fitness_values))
+    gen_stats = {
+        "best_chromosome": _chromosomes_from_array(population_array[[best_idx]])[0],
+        "best_fitness": float(fitness_values[best_idx]),
+        "best_distance": float(population_eval["distance"][best_idx]), # 유효하지 않으면 inf
+        "best_throughput": float(population_eval["throughput"][best_idx]), # 유효하지 않으면 0
+        "avg_fitness": (current_gen_total_fitness / current_gen_scored_count) if current_gen_scored_count > 0 else -float('inf'),
+        "valid_ratio": (current_gen_valid_individuals_count / population_size) * 100,
+        "valid_count": current_gen_valid_individuals_count,
+        "scored_count": current_gen_scored_count,
+        "total_fitness": current_gen_total_fitness,
+        "population_size": population_size,
+        "diversity": diversity,
+        "cache_hits": fitness_cache.hits - cache_hits_before if fitness_cache is not None else None,
+        "cache_misses": fitness_cache.misses - cache_misses_before if fitness_cache is not None else None,
+        "memetic_improvements": memetic_improvements,
+    }
+
+    # 엘리트주의 + 선택/교차/변이 (배열 단위). 배치 연산용 난수 생성기는 파이썬 난수에서 파생해 시드/체크포인트 재현성을 유지
+    elite_indices = ranked_indices[:ELITISM_COUNT][scored_flags[ranked_indices[:ELITISM_COUNT]]]
+    gen_stats["elite_chromosomes"] = _chromosomes_from_array(population_array[elite_indices]) # 적합도 내림차순 (섬 모델 이주 후보)
+    rng = np.random.default_rng(random.getrandbits(64))
+    breed_next_generation(population_array, fitness_values, valid_flags, elite_indices, problem,
+                          population_buffer.next_generation, mutation_rate, crossover_rate, mutation_rate_per_gene, rng)
+    gen_stats["profile"] = _profiler.take() if _profiler is not None else None # 이 세대의 단계별 시간/호출 수
+
+    population_buffer.swap()
+    return gen_stats
+
+# --- 섬 모델 (프로세스별 독립 집단 + 주기적 이주) ---
+_worker_fitness_cache = None # 섬 워커 프로세스별 적합도 캐시 (문제 정의가 같으므로 어느 섬이 와도 재사용 가능)
+
+def _run_island_epoch(island_population, rng_state, num_generations, island_population_size, operator_rates):
+    """
+    섬 하나를 num_generations 세대 진행합니다. 난수 상태를 작업과 함께 주고받으므로
+    어느 워커가 어느 섬을 맡든 결과가 같습니다.
+    """
+    global _worker_fitness_cache, _profiler
+    if _worker_fitness_cache is None and FITNESS_CACHE_SIZE > 0:
+        _worker_fitness_cache = FitnessCache(FITNESS_CACHE_SIZE)
+    if PROFILE_PHASES and _profiler is None: _profiler = PhaseProfiler()
+    if isinstance(rng_state, int): random.seed(rng_state) # 첫 에폭: 섬 시드
+    else: random.setstate(rng_state)
+    if island_population is None:
+        with profile_phase("initialization"):
+            island_population = create_initial_population(_worker_problem, island_population_size)
+
+    def evaluate_batch(population_array, fitness_threshold=None):
+        return calculate_population_fitness(population_array, _worker_problem, fitness_threshold)
+
+    def refine_individual(chromosome, deadline):
+        return local_search_chromosome(chromosome, _worker_problem, deadline=deadline)
+
+    population_buffer = PopulationBuffer(island_population)
+    epoch_stats = []
+    for _ in range(num_generations):
+        gen_stats = evolve_generation(population_buffer, _worker_problem, evaluate_batch, _worker_fitness_cache,
+                                      local_search=refine_individual, **operator_rates)
+        epoch_stats.append(gen_stats)
+    return population_buffer.current, random.getstate(), epoch_stats
+
+def merge_generation_stats(stats_list):
+    """여러 섬의 같은 세대 통계를 하나로 합칩니다 (최고 개체는 섬 전체 최고, 평균/유효율은 전체 개체 기준)."""
+    best_stats = max(stats_list, key=lambda gen_stats: gen_stats["best_fitness"])
+    valid_count = sum(gen_stats["valid_count"] for gen_stats in stats_list)
+    scored_count = sum(gen_stats["scored_count"] for gen_stats in stats_list)
+    total_fitness = sum(gen_stats["total_fitness"] for gen_stats in stats_list)
+    population_size = sum(gen_stats["population_size"] for gen_stats in stats_list)
+    has_cache = all(gen_stats["cache_hits"] is not None for gen_stats in stats_list)
+    has_profile = all(gen_stats["profile"] is not None for gen_stats in stats_list)
+    return {
+        "best_chromosome": best_stats["best_chromosome"],
+        "best_fitness": best_stats["best_fitness"],
+        "best_distance": best_stats["best_distance"],
+        "best_throughput": best_stats["best_throughput"],
+        "avg_fitness": (total_fitness / scored_count) if scored_count > 0 else -float('inf'),
+        "valid_ratio": (valid_count / population_size) * 100,
+        "valid_count": valid_count,
+        "scored_count": scored_count,
+        "total_fitness": total_fitness,
+        "population_size": population_size,
+        "diversity": sum(gen_stats["diversity"] * gen_stats["population_size"] for gen_stats in stats_list) / population_size,
+        "cache_hits": sum(gen_stats["cache_hits"] for gen_stats in stats_list) if has_cache else None,
+        "cache_misses": sum(gen_stats["cache_misses"] for gen_stats in stats_list) if has_cache else None,
+        "memetic_improvements": sum(gen_stats["memetic_improvements"] for gen_stats in stats_list),
+        "elite_chromosomes": best_stats["elite_chromosomes"],
+        "profile": merge_profiles([gen_stats["profile"] for gen_stats in stats_list]) if has_profile else None,
+    }
+
+class IslandModel:
+    """
+    독립된 집단(섬) K개를 각각 워커 프로세스에서 진화시키고, 에폭(이주 주기)마다
+    상위 개체를 토폴로지("ring": i -> i+1, "full": 모든 섬 -> 모든 섬)를 따라 이주시킵니다.
+    이주 개체는 받는 섬의 다음 세대에서 맨 뒤(엘리트가 아닌 자식) 개체를 대체합니다.
+    """
+    def __init__(self, island_count, island_population_size, problem, topology="ring", migration_count=2):
+        if topology not in ("ring", "full"):
+            raise ValueError(f"알 수 없는 섬 토폴로지: {topology}")
+        self.island_count = island_count
+        self.island_population_size = island_population_size
+        self.topology = topology
+        self.migration_count = migration_count
+        self.populations = [None] * island_count # 섬별 (개체, 설비, 2) int16 배열. None이면 워커가 첫 에폭에서 초기 집단 생성
+        self.rng_states = [random.getrandbits(64) for _ in range(island_count)] # 메인 난수에서 파생된 섬별 시드
+        self.executor = create_eval_executor(island_count, problem)
+
+    def started(self):
+        """첫 에폭이 끝나 섬별 집단과 난수 상태가 채워졌는지 (그 전에는 체크포인트로 저장할 섬 상태가 없음)."""
+        return all(population is not None for population in self.populations)
+
+    def migration_targets(self, source):
+        if self.topology == "ring": return [(source + 1) % self.island_count]
+        return [target for target in range(self.island_count) if target != source]
+
+    def run_epoch(self, num_generations, operator_rates=None):
+        """
+        모든 섬을 num_generations 세대 진행하고 이주를 수행합니다. 세대별로 합친 통계 목록을 돌려줍니다.
+        operator_rates: evolve_generation에 넘길 연산자 비율 dict (None이면 전역 설정값)
+        """
+        futures = [self.executor.submit(_run_island_epoch, self.populations[i], self.rng_states[i],
+                                          num_generations, self.island_population_size, operator_rates or {})
+                   for i in range(self.island_count)]
+        island_results = [future.result() for future in futures]
+        self.populations = [result[0] for result in island_results]
+        self.rng_states = [result[1] for result in island_results]
+        per_island_stats = [result[2] for result in island_results]
+
+        incoming = [[] for _ in range(self.island_count)]
+        for source in range(self.island_count):
+            migrants = per_island_stats[source][-1]["elite_chromosomes"][:self.migration_count]
+            for target in self.migration_targets(source):
+                incoming[target].extend(migrants)
+        for target, migrants in enumerate(incoming):
+            migrants = migrants[:max(0, self.island_population_size - ELITISM_COUNT)] # 받는 섬의 엘리트는 보존
+            if migrants:
+                self.populations[target][-len(migrants):] = migrants
+
+        return [merge_generation_stats([island_stats[g] for island_stats in per_island_stats]) for g in range(num_generations)]
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+# --- 종료 조건 및 적응형 연산자 비율 ---
+class RunProgress:
+    """
+    종료 조건과 적응형 연산자 비율이 보는 진행 상태입니다: 진행한 세대 수, 최고 적합도가 마지막으로
+    EARLY_STOP_MIN_IMPROVEMENT 이상 개선된 세대, 마지막 세대의 다양성/최고 개체 생산량.
+    세대 로그 전체 대신 이 값들만 갱신하므로 메모리가 세대 수와 무관하며, state()로 체크포인트에 저장합니다.
+    """
+    def __init__(self, state=None):
+        self.generations = 0
+        self.best_fitness = -float('inf') # 마지막으로 개선으로 인정된 최고 적합도
+        self.last_improvement = 0 # 그 세대의 인덱스 (0부터)
+        self.diversity = None
+        self.best_throughput = None
+        if state: self.__dict__.update(state)
 
-    machines_for_ga_processing_order = [next(m for m in machines_definitions if m["id"] == pid) for pid in PROCESS_SEQUENCE]
-    num_total_machines = len(machines_for_ga_processing_order)
+    def update(self, gen_stats):
+        if gen_stats["best_fitness"] > self.best_fitness + EARLY_STOP_MIN_IMPROVEMENT:
+            self.best_fitness = gen_stats["best_fitness"]
+            self.last_improvement = self.generations
+        self.generations += 1
+        self.diversity = gen_stats["diversity"]
+        self.best_throughput = gen_stats["best_throughput"]
+
+    def generations_since_improvement(self):
+        """최고 적합도가 마지막으로 개선된 이후 지난 세대 수."""
+        return self.generations - 1 - self.last_improvement if self.generations else 0
+
+    def state(self):
+        return dict(self.__dict__)
+
+def check_termination(progress, elapsed_seconds, target_prod_throughput):
+    """
+    설정된 종료 조건을 진행 상태(RunProgress)로 판정합니다.
+
+    Returns:
+        str: 종료 사유 (계속 진행하면 None)
+    """
+    if progress.generations == 0: return None
+    if EARLY_STOP_STAGNATION_WINDOW > 0:
+        stagnant = progress.generations_since_improvement()
+        if stagnant >= EARLY_STOP_STAGNATION_WINDOW:
+            return f"{stagnant}세대 동안 최고 적합도 개선 없음"
+    if EARLY_STOP_MIN_DIVERSITY > 0 and progress.diversity < EARLY_STOP_MIN_DIVERSITY:
+        return f"집단 다양성 {progress.diversity:.4f} < {EARLY_STOP_MIN_DIVERSITY}"
+    if TIME_BUDGET_SECONDS > 0 and elapsed_seconds >= TIME_BUDGET_SECONDS:
+        return f"실행 시간 예산 {TIME_BUDGET_SECONDS}초 소진"
+    if STOP_ON_TARGET_THROUGHPUT and progress.best_throughput >= target_prod_throughput:
+        return f"목표 생산량 {target_prod_throughput} 달성"
+    return None
+
+def adaptive_operator_rates(progress):
+    """
+    다양성 부족 정도와 개선 정체 정도 중 큰 값을 탐색 압력(0~1)으로 삼아,
+    압력이 높을수록 변이 비율을 최댓값 쪽으로, 교차 비율을 최솟값 쪽으로 옮깁니다.
+    진행 상태(RunProgress)만으로 계산하므로 체크포인트에서 재개해도 같은 비율이 나옵니다.
+
+    Returns:
+        dict: evolve_generation에 넘길 {"mutation_rate", "crossover_rate", "mutation_rate_per_gene"}
+    """
+    if progress.generations == 0:
+        return {"mutation_rate": MUTATION_RATE, "crossover_rate": CROSSOVER_RATE, "mutation_rate_per_gene": MUTATION_RATE_PER_GENE}
+    stagnation = progress.generations_since_improvement() / max(ADAPTIVE_STAGNATION_WINDOW, 1)
+    diversity_deficit = 1.0 - progress.diversity / ADAPTIVE_DIVERSITY_TARGET
+    pressure = min(max(stagnation, diversity_deficit, 0.0), 1.0)
+    return {
+        "mutation_rate": MUTATION_RATE + (max(MUTATION_RATE_MAX, MUTATION_RATE) - MUTATION_RATE) * pressure,
+        "crossover_rate": CROSSOVER_RATE - (CROSSOVER_RATE - min(CROSSOVER_RATE_MIN, CROSSOVER_RATE)) * pressure,
+        "mutation_rate_per_gene": MUTATION_RATE_PER_GENE + (max(MUTATION_RATE_PER_GENE_MAX, MUTATION_RATE_PER_GENE) - MUTATION_RATE_PER_GENE) * pressure,
+    }
+
+# --- 체크포인트 저장/재개 ---
+# 재개 시 그대로 복원하는 하이퍼파라미터 (같은 설정이어야 중단 전과 비트 단위로 같은 진행을 보장)
+CHECKPOINT_HYPERPARAMETER_NAMES = [
+    "RANDOM_SEED", "FACTORY_WIDTH", "FACTORY_HEIGHT", "TARGET_PRODUCTION_PER_HOUR", "MATERIAL_TRAVEL_SPEED_UNITS_PER_SECOND",
+    "POPULATION_SIZE", "NUM_GENERATIONS", "MUTATION_RATE", "CROSSOVER_RATE", "ELITISM_COUNT", "TOURNAMENT_SIZE",
+    "FITNESS_THROUGHPUT_WEIGHT", "FITNESS_DISTANCE_WEIGHT", "BONUS_FOR_TARGET_ACHIEVEMENT_FACTOR",
+    "NUM_EVAL_WORKERS", "FITNESS_CACHE_SIZE", "ISLAND_COUNT", "ISLAND_MIGRATION_INTERVAL", "ISLAND_MIGRATION_COUNT", "ISLAND_TOPOLOGY",
+    "MUTATION_RATE_PER_GENE", "EARLY_STOP_STAGNATION_WINDOW", "EARLY_STOP_MIN_IMPROVEMENT", "EARLY_STOP_MIN_DIVERSITY",
+    "TIME_BUDGET_SECONDS", "STOP_ON_TARGET_THROUGHPUT", "ADAPTIVE_OPERATOR_RATES", "ADAPTIVE_DIVERSITY_TARGET",
+    "ADAPTIVE_STAGNATION_WINDOW", "MUTATION_RATE_MAX", "MUTATION_RATE_PER_GENE_MAX", "CROSSOVER_RATE_MIN",
+    "REPAIR_OFFSPRING", "SEEDING_GREEDY_SHARE", "SEEDING_MODE", "FITNESS_DISTANCE_MODE", "AISLE_CUTOFF_FRACTION",
+    "MEMETIC_ELITE_COUNT", "MEMETIC_MAX_MOVES", "MEMETIC_TIME_BUDGET_SECONDS",
+    "SPARSE_PLACEMENT_MIN_AREA", "SPARSE_SAMPLE_ATTEMPTS",
+]
+# run_ga의 config로 바꿀 수 있는 설정 (결과에 영향이 없는 성능/저장 관련 설정 포함)
+RUN_CONFIG_NAMES = CHECKPOINT_HYPERPARAMETER_NAMES + [
+    "FEASIBILITY_SWEEP_THRESHOLD", "FEASIBILITY_BLOCK_PAIRS", "SPARSE_BUCKET_SIZE", "SPARSE_CANDIDATE_CHUNK", "CHECKPOINT_FILE", "CHECKPOINT_INTERVAL",
+    "METRICS_FILE", "AISLE_DISTANCE_CACHE_SIZE", "PROFILE_PHASES", "PROFILE_SUMMARY_FILE", "PROFILE_CAPTURE_GENERATIONS", "PROFILE_TRACEMALLOC",
+]
+
+def current_config():
+    """현재 모듈 설정값 {이름: 값} (RUN_CONFIG_NAMES)."""
+    return {name: globals()[name] for name in RUN_CONFIG_NAMES}
+
+def apply_config(config):
+    """설정값 dict를 모듈 전역 설정에 적용합니다. 알 수 없는 이름이 있으면 아무것도 바꾸지 않고 ValueError."""
+    unknown_names = [name for name in config if name not in RUN_CONFIG_NAMES]
+    if unknown_names:
+        raise ValueError(f"알 수 없는 설정 이름: {unknown_names}")
+    globals().update(config)
+
+def build_checkpoint(generation, population, best_overall_fitness, best_overall_chromosome, progress,
+                     problem, island_model=None, generation_logs=None):
+    """
+    현재 진화 상태를 체크포인트 dict(배열 + JSON 메타데이터)로 만듭니다.
+    모든 값을 복사해 두므로 백그라운드 스레드에서 저장하는 동안 진화를 계속해도 안전합니다.
+
+    Args:
+        population: 다음 세대 집단 (섬 모델이면 무시되고 섬별 집단이 저장됨)
+        progress: RunProgress (종료 조건/적응형 비율 상태)
+        generation_logs: 메모리에 모은 세대 로그 {"best_fitness": [...], ...}. 지표 파일로 스트리밍하는 경우 None (저장하지 않음)
+    """
+    rng_version, rng_internal, rng_gauss_next = random.getstate()
+    meta = {
+        "generation": generation,
+        "process_sequence": list(problem.process_sequence),
+        "machines_definitions": problem.machines_definitions,
+        "hyperparameters": {name: globals()[name] for name in CHECKPOINT_HYPERPARAMETER_NAMES},
+        "progress": progress.state(),
+        "rng_version": rng_version,
+        "rng_gauss_next": rng_gauss_next,
+    }
+    checkpoint = {
+        "rng_internal": np.array(rng_internal, dtype=np.uint32),
+        "best_overall_fitness": np.array(best_overall_fitness, dtype=np.float64),
+        "best_overall_chromosome": np.array(best_overall_chromosome if best_overall_chromosome else np.empty((0, 2)), dtype=np.int16),
+    }
+    for log_name, log_values in (generation_logs or {}).items():
+        checkpoint[f"log_{log_name}"] = np.array(log_values, dtype=np.float64)
+    if island_model is not None:
+        checkpoint["island_populations"] = np.array(island_model.populations, dtype=np.int16) # (섬, 개체, 설비, 2)
+        checkpoint["island_rng_internal"] = np.array([state[1] for state in island_model.rng_states], dtype=np.uint32)
+        meta["island_rng_gauss_next"] = [state[2] for state in island_model.rng_states]
+    else:
+        checkpoint["population"] = np.array(population, dtype=np.int16) # (개체, 설비, 2)
+    checkpoint["meta"] = np.array(json.dumps(meta, ensure_ascii=False))
+    return checkpoint
+
+def save_checkpoint(path, checkpoint):
+    """압축 npz로 임시 파일에 쓴 뒤 교체하므로, 저장 중 중단되어도 이전 체크포인트가 손상되지 않습니다."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **checkpoint)
+    os.replace(tmp_path, path)
+
+def _chromosomes_from_array(population_array):
+    return [[(int(x), int(y)) for x, y in chromo] for chromo in population_array]
+
+def load_checkpoint(path):
+    """save_checkpoint로 저장한 파일을 읽어 파이썬 값(염색체는 (x, y) 튜플 리스트)으로 돌려줍니다."""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        checkpoint = {
+            "generation": meta["generation"],
+            "process_sequence": meta["process_sequence"],
+            "machines_definitions": [dict(m_def, footprint=tuple(m_def["footprint"])) for m_def in meta["machines_definitions"]],
+            "hyperparameters": meta["hyperparameters"],
+            "rng_state": (meta["rng_version"], tuple(int(v) for v in data["rng_internal"]), meta["rng_gauss_next"]),
+            "best_overall_fitness": float(data["best_overall_fitness"]),
+            "best_overall_chromosome": _chromosomes_from_array(data["best_overall_chromosome"][None])[0] or None,
+            "progress": RunProgress(meta["progress"]),
+            "generation_logs": {key[len("log_"):]: data[key].tolist() for key in data.files if key.startswith("log_")} or None,
+            "population": _chromosomes_from_array(data["population"]) if "population" in data.files else None,
+            "island_populations": None,
+        }
+        if "island_populations" in data.files:
+            checkpoint["island_populations"] = [_chromosomes_from_array(island) for island in data["island_populations"]]
+            checkpoint["island_rng_states"] = [(meta["rng_version"], tuple(int(v) for v in internal), gauss_next)
+                                               for internal, gauss_next in zip(data["island_rng_internal"], meta["island_rng_gauss_next"])]
+    return checkpoint
+
+class CheckpointWriter:
+    """체크포인트를 백그라운드 스레드에서 저장합니다. 이전 저장이 끝나지 않았으면 그것만 기다린 뒤 시작합니다."""
+    def __init__(self, path):
+        self.path = path
+        self._thread = None
+
+    def save_async(self, checkpoint):
+        self.wait()
+        self._thread = threading.Thread(target=self._write, args=(checkpoint,), daemon=True)
+        self._thread.start()
+
+    def _write(self, checkpoint):
+        try:
+            save_checkpoint(self.path, checkpoint)
+        except Exception as e:
+            print(f"체크포인트 저장 중 오류 발생: {e}")
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+# --- 세대별 지표 스트리밍 ---
+METRICS_FIELDS = ["generation", "best_fitness", "avg_fitness", "best_distance", "best_throughput", "valid_ratio", "diversity",
+                  "cache_hits", "cache_misses", "memetic_improvements", "generation_seconds", "elapsed_seconds"]
+GENERATION_LOG_FIELDS = ["best_fitness", "avg_fitness", "best_distance", "best_throughput", "valid_ratio", "diversity"] # generation_logs 키
+
+class MetricsWriter:
+    """
+    세대별 지표 레코드(METRICS_FIELDS dict)를 JSON Lines 또는 CSV 파일에 한 줄씩 기록하는 지표 싱크입니다.
+    write는 큐에 넣기만 하고 실제 쓰기는 백그라운드 스레드가 하며, 쌓인 레코드를 다 쓸 때마다 flush하므로
+    실행 중에도 파일을 tail로 따라 볼 수 있습니다. run_ga에는 write(record)/close()를 가진 어떤 객체든 넘길 수 있습니다.
+    """
+    def __init__(self, path, file_format=None, append=False):
+        self.path = path
+        self.file_format = file_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        if self.file_format not in ("jsonl", "csv"):
+            raise ValueError(f"알 수 없는 지표 파일 형식: {self.file_format}")
+        self._append = append
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        self._queue.put(record)
+
+    def close(self):
+        """남은 레코드를 모두 쓰고 파일을 닫습니다."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            write_header = not (self._append and os.path.exists(self.path) and os.path.getsize(self.path) > 0)
+            with open(self.path, "a" if self._append else "w", newline="", encoding="utf-8") as f:
+                csv_writer = None
+                if self.file_format == "csv":
+                    csv_writer = csv.DictWriter(f, fieldnames=METRICS_FIELDS, extrasaction="ignore")
+                    if write_header: csv_writer.writeheader()
+                while True:
+                    record = self._queue.get()
+                    if record is None: break
+                    if csv_writer is not None: csv_writer.writerow(record)
+                    else: f.write(json.dumps(record) + "\n")
+                    if self._queue.empty(): f.flush() # 밀린 레코드가 없을 때만 flush (빠른 세대는 묶어서 기록)
+        except Exception as e:
+            print(f"지표 기록 중 오류 발생: {e}")
+            while self._queue.get() is not None: pass # close가 막히지 않도록 남은 레코드를 버림
+
+class GenerationLogSink:
+    """
+    METRICS_FILE 없이 실행할 때 run_ga가 쓰는 기본 지표 싱크입니다. 레코드의 GENERATION_LOG_FIELDS 값을
+    메모리 리스트(generation_logs 형식)에 모으므로 메모리가 세대 수에 비례합니다.
+    """
+    def __init__(self, generation_logs=None):
+        self.logs = {field: list((generation_logs or {}).get(field, [])) for field in GENERATION_LOG_FIELDS}
+
+    def write(self, record):
+        for field in GENERATION_LOG_FIELDS:
+            self.logs[field].append(record[field])
+
+    def close(self):
+        pass
+
+def load_metrics(path):
+    """
+    MetricsWriter가 기록한 파일을 읽어 generation_logs 형식({"best_fitness": [...], ...})으로 돌려줍니다.
+    체크포인트에서 재개해 같은 세대가 두 번 기록된 경우 나중 레코드를 사용합니다.
+    """
+    records_by_generation = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"): records = csv.DictReader(f)
+        else: records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            records_by_generation[int(record["generation"])] = record
+    ordered = [records_by_generation[gen] for gen in sorted(records_by_generation)]
+    return {field: [float(record[field]) for record in ordered] for field in GENERATION_LOG_FIELDS}
+
+# --- 프로파일 캡처/요약 ---
+def start_profile_capture():
+    """한 세대를 cProfile(과 PROFILE_TRACEMALLOC이면 tracemalloc)로 기록하기 시작합니다. 필요할 때만 임포트합니다."""
+    import cProfile
+    if PROFILE_TRACEMALLOC:
+        import tracemalloc
+        tracemalloc.start()
+    session = cProfile.Profile()
+    session.enable()
+    return session
+
+def finish_profile_capture(session, generation):
+    """start_profile_capture로 시작한 기록을 끝내고 ga_profile_gen{세대}.prof로 저장합니다."""
+    session.disable()
+    capture = {"cprofile_file": f"ga_profile_gen{generation}.prof", "tracemalloc_top": None}
+    if PROFILE_TRACEMALLOC: # dump_stats의 할당이 섞이지 않도록 먼저 스냅숏
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        capture["tracemalloc_top"] = [str(stat) for stat in snapshot.statistics("lineno")[:10]]
+    session.dump_stats(capture["cprofile_file"])
+    return capture
+
+def write_profile_summary(path, profile_totals, num_generations, profile_captures):
+    """누적된 단계별 시간/호출 수를 JSON 요약 파일로 저장합니다 (세대당 평균 포함)."""
+    per_generation = max(num_generations, 1)
+    phases = {name: {"wall_seconds": wall, "cpu_seconds": profile_totals["cpu_seconds"].get(name, 0.0),
+                     "wall_ms_per_generation": wall * 1000 / per_generation}
+              for name, wall in sorted(profile_totals["wall_seconds"].items(), key=lambda item: -item[1])}
+    summary = {"generations": num_generations, "phases": phases, "call_counts": profile_totals["counts"],
+               "captures": {str(generation): capture for generation, capture in profile_captures.items()}}
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"⏱️ 프로파일 요약 저장 완료: {path}")
+    except Exception as e:
+        print(f"프로파일 요약 저장 중 오류 발생: {e}")
+
+# --- 라이브러리 진입점 ---
+def run_ga(instance, config=None, resume_checkpoint=None, checkpoint_path=None, metrics_sink=None):
+    """
+    유전 알고리즘을 NUM_GENERATIONS까지 (또는 CTRL+C 중단/조기 종료 조건까지) 실행합니다.
+    matplotlib 없이 동작하므로 디스플레이 없는 배치 작업에서 임포트해 호출할 수 있습니다.
+
+    Args:
+        instance: ProblemInstance
+        config: 모듈 설정 재정의 dict (예: {"POPULATION_SIZE": 100, "RANDOM_SEED": 7}, 이름은 RUN_CONFIG_NAMES).
+                모듈 전역 설정을 바꾸므로 같은 프로세스의 이후 호출에도 유지됩니다.
+                RANDOM_SEED가 있으면 시작 전에 random.seed로 시드하고, 없으면 현재 random 상태를 이어 씁니다.
+        resume_checkpoint: load_checkpoint 결과. 주어지면 그 세대부터 이어서 진행합니다
+                           (체크포인트의 하이퍼파라미터는 호출 전에 복원되어 있어야 함).
+        checkpoint_path: 체크포인트 저장 경로 (None이면 CHECKPOINT_FILE)
+        metrics_sink: 세대마다 write(record)를 호출할 지표 싱크 (호출한 쪽에서 close).
+                      None이면 METRICS_FILE이 설정된 경우 MetricsWriter를 만들어 쓰고 끝나면 닫으며 (재개하면 기존 파일 뒤에 이어 씀),
+                      METRICS_FILE도 비어 있으면 메모리에 모으는 GenerationLogSink를 씁니다.
+                      세대 로그를 메모리에 두는 것은 이 마지막 경우뿐입니다.
+
+    Returns:
+        dict: {"best_fitness", "best_chromosome", "evaluation"(최고 개체의 calculate_fitness 결과, 없으면 None),
+               "generation", "interrupted", "termination_reason",
+               "generation_logs"(GenerationLogSink로 모은 세대 로그, 다른 싱크를 썼으면 None),
+               "metrics_file"(이번 실행이 기록한 지표 파일, 없으면 None. 세대 로그는 load_metrics로 다시 구성)}
+    """
+    global _profiler
+    if config:
+        apply_config(config)
+        if "RANDOM_SEED" in config: random.seed(RANDOM_SEED)
+    _profiler = PhaseProfiler() if PROFILE_PHASES else None
+    profile_totals = {"wall_seconds": {}, "cpu_seconds": {}, "counts": {}}
+    profile_captures = {} # 세대 -> {"cprofile_file", "tracemalloc_top"}
+    problem = instance
+    checkpoint_path = checkpoint_path or CHECKPOINT_FILE
+    checkpoint_writer = CheckpointWriter(checkpoint_path)
+    owned_metrics_file = None
+    memory_log_sink = None # 지표 파일/싱크가 없을 때만 세대 로그를 메모리에 모음
+    if metrics_sink is None and METRICS_FILE:
+        owned_metrics_file = METRICS_FILE
+        metrics_sink = MetricsWriter(METRICS_FILE, append=resume_checkpoint is not None)
+    elif metrics_sink is None:
+        memory_log_sink = GenerationLogSink(resume_checkpoint["generation_logs"] if resume_checkpoint is not None else None)
+        metrics_sink = memory_log_sink
 
     print(f"초기 집단 생성 중 (크기: {POPULATION_SIZE})...")
-    population = [create_individual(machines_for_ga_processing_order, FACTORY_WIDTH, FACTORY_HEIGHT) for _ in range(POPULATION_SIZE)]
-    print("초기 집단 생성 완료.")
+    eval_executor = None
+    island_model = None
+    try:
+        if NUM_EVAL_WORKERS > 1 and ISLAND_COUNT <= 1: # 섬 모델은 섬 프로세스 안에서 평가하므로 평가 풀이 필요 없음
+            print(f"병렬 평가 사용 (워커 {NUM_EVAL_WORKERS}개)")
+            eval_executor = create_eval_executor(NUM_EVAL_WORKERS, problem)
+
+        def evaluate_population_batch(population_array, fitness_threshold=None):
+            if eval_executor is not None:
+                return calculate_population_fitness_parallel(eval_executor, population_array, NUM_EVAL_WORKERS, fitness_threshold)
+            return calculate_population_fitness(population_array, problem, fitness_threshold)
+
+        def refine_individual(chromosome, deadline):
+            return local_search_chromosome(chromosome, problem, deadline=deadline)
+
+        fitness_cache = FitnessCache(FITNESS_CACHE_SIZE) if FITNESS_CACHE_SIZE > 0 else None
+
+        population_buffer = None # 단일 집단 모드의 (개체, 설비, 2) int16 이중 버퍼
+        if ISLAND_COUNT > 1:
+            print(f"섬 모델 사용 (섬 {ISLAND_COUNT}개, {ISLAND_TOPOLOGY} 토폴로지, {ISLAND_MIGRATION_INTERVAL}세대마다 {ISLAND_MIGRATION_COUNT}개체 이주)")
+            island_model = IslandModel(ISLAND_COUNT, POPULATION_SIZE, problem,
+                                       topology=ISLAND_TOPOLOGY, migration_count=ISLAND_MIGRATION_COUNT)
+        elif resume_checkpoint is not None:
+            population_buffer = PopulationBuffer(resume_checkpoint["population"])
+        else:
+            with profile_phase("initialization"):
+                population_buffer = PopulationBuffer(create_initial_population(problem, POPULATION_SIZE))
+        print("초기 집단 생성 완료.")
     
-    best_overall_fitness = -float('inf')
-    best_overall_chromosome = None
+        best_overall_fitness = -float('inf')
+        best_overall_chromosome = None
     
-    # [NEW] 로그 리스트 초기화
-    generation_best_fitness_log = []
-    generation_avg_fitness_log = []
-    generation_best_distance_log = []      # 추가: 최고 개체 거리 로그
-    generation_best_throughput_log = []    # 추가: 최고 개체 생산량 로그
-    generation_valid_ratio_log = []        # 추가: 유효 개체 비율 로그
-
-    for generation in range(1, NUM_GENERATIONS + 1):
-        if interrupted:
-            print(f"\n🛑 유전 알고리즘 중단 요청됨 (세대 {generation})")
-            break
-
-        all_eval_results = [] # (chromosome, eval_dict) 저장
-        current_gen_total_fitness = 0
-        current_gen_valid_individuals_count = 0
-
-        for chromo in population:
-            eval_dict = calculate_fitness(chromo, machines_for_ga_processing_order, PROCESS_SEQUENCE,
-                                          FACTORY_WIDTH, FACTORY_HEIGHT, TARGET_PRODUCTION_PER_HOUR,
-                                          MATERIAL_TRAVEL_SPEED_UNITS_PER_SECOND)
-            all_eval_results.append((chromo, eval_dict))
-            if eval_dict["is_valid"]:
-                current_gen_total_fitness += eval_dict["fitness"]
-                current_gen_valid_individuals_count += 1
-        
-        if not all_eval_results:
-             print(f"세대 {generation}: 평가 결과 없음! 알고리즘 중단."); break
+        progress = RunProgress() # 종료 조건/적응형 비율용 진행 상태 (세대 로그는 metrics_sink로만 내보냄)
 
-        # 현재 세대 최고 개체 정보
-        current_gen_best_item = max(all_eval_results, key=lambda item: item[1]['fitness'])
-        current_gen_best_chromosome = current_gen_best_item[0]
-        current_gen_best_eval_dict = current_gen_best_item[1]
-        
-        current_gen_best_fitness = current_gen_best_eval_dict['fitness']
-        current_gen_best_distance = current_gen_best_eval_dict['distance']
-        current_gen_best_throughput = current_gen_best_eval_dict['throughput']
-        
-        generation_best_fitness_log.append(current_gen_best_fitness)
-        generation_best_distance_log.append(current_gen_best_distance) # 유효하지 않으면 inf가 기록될 수 있음
-        generation_best_throughput_log.append(current_gen_best_throughput) # 유효하지 않으면 0이 기록될 수 있음
+        generation = 0
+        if resume_checkpoint is not None:
+            generation = resume_checkpoint["generation"]
+            best_overall_fitness = resume_checkpoint["best_overall_fitness"]
+            best_overall_chromosome = resume_checkpoint["best_overall_chromosome"]
+            progress = resume_checkpoint["progress"]
+            if island_model is not None:
+                island_model.populations = resume_checkpoint["island_populations"]
+                island_model.rng_states = resume_checkpoint["island_rng_states"]
+            random.setstate(resume_checkpoint["rng_state"])
 
-        valid_ratio = (current_gen_valid_individuals_count / POPULATION_SIZE) * 100 if POPULATION_SIZE > 0 else 0
-        generation_valid_ratio_log.append(valid_ratio)
-        
-        current_gen_avg_fitness = (current_gen_total_fitness / current_gen_valid_individuals_count) if current_gen_valid_individuals_count > 0 else -float('inf')
-        generation_avg_fitness_log.append(current_gen_avg_fitness)
+        run_start_time = time.time()
+        termination_reason = None
 
-        if current_gen_best_fitness > best_overall_fitness:
-            best_overall_fitness = current_gen_best_fitness
-            best_overall_chromosome = current_gen_best_chromosome
-            print(f"  🌟 세대 {generation}: 새 최고 적합도 발견! {best_overall_fitness:.2f} (거리: {current_gen_best_distance:.2f}, 생산량: {current_gen_best_throughput:.2f})")
+        def make_checkpoint():
+            return build_checkpoint(generation, population_buffer.current if population_buffer is not None else None, best_overall_fitness, best_overall_chromosome, progress,
+                                    problem, island_model, memory_log_sink.logs if memory_log_sink is not None else None)
 
-        print(f"세대 {generation}/{NUM_GENERATIONS} - 최고F: {current_gen_best_fitness:.2f}, 평균F: {current_gen_avg_fitness:.2f}, 유효율: {valid_ratio:.1f}%")
-        
-        new_population = []
-        # 엘리트주의
-        all_eval_results.sort(key=lambda item: item[1]['fitness'], reverse=True)
-        for i in range(ELITISM_COUNT):
-            if i < len(all_eval_results) and all_eval_results[i][1]["is_valid"]:
-                 new_population.append(all_eval_results[i][0])
-
-        num_offspring_to_generate = POPULATION_SIZE - len(new_population)
-        eligible_parents_for_selection = [item for item in all_eval_results if item[1]["is_valid"]]
-        if not eligible_parents_for_selection: eligible_parents_for_selection = all_eval_results # 최악의 경우
-
-        current_offspring_count = 0
-        while current_offspring_count < num_offspring_to_generate:
-            if not eligible_parents_for_selection: break
-            parent1_chromo = selection(eligible_parents_for_selection, TOURNAMENT_SIZE)
-            parent2_chromo = selection(eligible_parents_for_selection, TOURNAMENT_SIZE)
-            if parent1_chromo is None or parent2_chromo is None: # 부모 선택에 문제가 생기면
-                if eligible_parents_for_selection: # 유효한 부모 후보가 있다면 거기서 임의로 가져옴
-                    parent1_chromo = random.choice(eligible_parents_for_selection)[0] if parent1_chromo is None else parent1_chromo
-                    parent2_chromo = random.choice(eligible_parents_for_selection)[0] if parent2_chromo is None else parent2_chromo
-                else: # 정말 아무것도 없으면 중단
-                    print("경고: 더 이상 부모를 선택할 수 없습니다.")
+        while generation < NUM_GENERATIONS:
+            if interrupted:
+                print(f"\n🛑 유전 알고리즘 중단 요청됨 (세대 {generation + 1})")
+                if island_model is not None and not island_model.started():
+                    print("첫 이주 주기가 끝나기 전이라 저장할 섬 상태가 없어 체크포인트를 만들지 않습니다.")
                     break
-            
-            child1_chromo, child2_chromo = crossover(parent1_chromo, parent2_chromo, CROSSOVER_RATE)
-            if random.random() < MUTATION_RATE: child1_chromo = mutate(child1_chromo, machines_for_ga_processing_order, FACTORY_WIDTH, FACTORY_HEIGHT, mutation_rate_per_gene=0.05)
-            if random.random() < MUTATION_RATE: child2_chromo = mutate(child2_chromo, machines_for_ga_processing_order, FACTORY_WIDTH, FACTORY_HEIGHT, mutation_rate_per_gene=0.05)
-            new_population.append(child1_chromo); current_offspring_count +=1
-            if current_offspring_count < num_offspring_to_generate: new_population.append(child2_chromo); current_offspring_count +=1
-        
-        while len(new_population) < POPULATION_SIZE:
-            # print(f"경고: 다음 세대 개체 수가 부족하여 무작위 개체 추가.")
-            new_population.append(create_individual(machines_for_ga_processing_order, FACTORY_WIDTH, FACTORY_HEIGHT))
-        population = new_population[:POPULATION_SIZE]
+                checkpoint_writer.save_async(make_checkpoint())
+                checkpoint_writer.wait()
+                print(f"💾 체크포인트 저장 완료: {checkpoint_path} (재개: --resume {checkpoint_path})")
+                break
+            generation_before_epoch = generation
+            epoch_start_time = time.time()
+            operator_rates = adaptive_operator_rates(progress) if ADAPTIVE_OPERATOR_RATES else {}
+
+            if island_model is not None:
+                # 섬마다 ISLAND_MIGRATION_INTERVAL 세대씩 진행한 뒤 이주. 세대별 통계는 섬 전체를 합친 값
+                epoch_stats = island_model.run_epoch(min(ISLAND_MIGRATION_INTERVAL, NUM_GENERATIONS - generation), operator_rates)
+            else:
+                capture = _profiler is not None and (generation + 1) in PROFILE_CAPTURE_GENERATIONS
+                if capture: capture_session = start_profile_capture()
+                gen_stats = evolve_generation(population_buffer, problem, evaluate_population_batch, fitness_cache,
+                                              local_search=refine_individual, **operator_rates)
+                if capture: profile_captures[generation + 1] = finish_profile_capture(capture_session, generation + 1)
+                epoch_stats = [gen_stats]
+            if not epoch_stats or epoch_stats[0] is None:
+                 print(f"세대 {generation + 1}: 평가 결과 없음! 알고리즘 중단."); break
+            generation_seconds = (time.time() - epoch_start_time) / len(epoch_stats) # 섬 모델은 에폭 시간을 세대 수로 나눈 값
+
+            for gen_stats in epoch_stats:
+                generation += 1
+                current_gen_best_fitness = gen_stats["best_fitness"]
+                current_gen_best_distance = gen_stats["best_distance"]
+                current_gen_best_throughput = gen_stats["best_throughput"]
+                current_gen_avg_fitness = gen_stats["avg_fitness"]
+                valid_ratio = gen_stats["valid_ratio"]
+                progress.update(gen_stats)
+                metrics_sink.write({
+                    "generation": generation, "best_fitness": current_gen_best_fitness, "avg_fitness": current_gen_avg_fitness,
+                    "best_distance": current_gen_best_distance, "best_throughput": current_gen_best_throughput, # 유효하지 않으면 inf/0
+                    "valid_ratio": valid_ratio, "diversity": gen_stats["diversity"],
+                    "cache_hits": gen_stats["cache_hits"], "cache_misses": gen_stats["cache_misses"],
+                    "memetic_improvements": gen_stats["memetic_improvements"],
+                    "generation_seconds": generation_seconds, "elapsed_seconds": time.time() - run_start_time,
+                })
+
+                if current_gen_best_fitness > best_overall_fitness:
+                    best_overall_fitness = current_gen_best_fitness
+                    best_overall_chromosome = gen_stats["best_chromosome"]
+                    print(f"  🌟 세대 {generation}: 새 최고 적합도 발견! {best_overall_fitness:.2f} (거리: {current_gen_best_distance:.2f}, 생산량: {current_gen_best_throughput:.2f})")
+
+                cache_info = ""
+                if gen_stats["cache_hits"] is not None:
+                    cache_info = f", 캐시 적중/미스: {gen_stats['cache_hits']}/{gen_stats['cache_misses']}"
+                if MEMETIC_ELITE_COUNT > 0:
+                    cache_info += f", 국소 탐색 개선: {gen_stats['memetic_improvements']}"
+                if operator_rates:
+                    cache_info += f", 변이/교차율: {operator_rates['mutation_rate']:.2f}/{operator_rates['crossover_rate']:.2f}"
+                if gen_stats.get("profile") is not None:
+                    merge_profiles([gen_stats["profile"]], into=profile_totals)
+                    cache_info += f", 단계별 ms: {format_phase_times(gen_stats['profile'])}, 호출 수: {format_call_counts(gen_stats['profile'])}"
+                print(f"세대 {generation}/{NUM_GENERATIONS} - 최고F: {current_gen_best_fitness:.2f}, 평균F: {current_gen_avg_fitness:.2f}, 유효율: {valid_ratio:.1f}%, 다양성: {gen_stats['diversity']:.3f}{cache_info}")
+
+            if CHECKPOINT_INTERVAL > 0 and generation // CHECKPOINT_INTERVAL > generation_before_epoch // CHECKPOINT_INTERVAL:
+                checkpoint_writer.save_async(make_checkpoint())
+
+            termination_reason = check_termination(progress, time.time() - run_start_time, problem.target_prod_throughput)
+            if termination_reason:
+                print(f"\n🏁 조기 종료 (세대 {generation}): {termination_reason}")
+                break
+    finally:
+        checkpoint_writer.wait()
+        if owned_metrics_file is not None: metrics_sink.close()
+        if island_model is not None: island_model.shutdown() # 중단/예외 시에도 워커 프로세스 정리
+        if eval_executor is not None: eval_executor.shutdown()
+
+    if _profiler is not None:
+        merge_profiles([_profiler.take()], into=profile_totals) # 마지막 세대 이후 남은 값 (CTRL+C 시점 등)
+        write_profile_summary(PROFILE_SUMMARY_FILE, profile_totals, generation - (resume_checkpoint["generation"] if resume_checkpoint else 0),
+                              profile_captures)
+        _profiler = None
+
+    evaluation = calculate_fitness(best_overall_chromosome, problem) if best_overall_chromosome else None
+    return {
+        "best_fitness": best_overall_fitness,
+        "best_chromosome": best_overall_chromosome,
+        "evaluation": evaluation,
+        "generation": generation,
+        "generation_logs": memory_log_sink.logs if memory_log_sink is not None else None,
+        "interrupted": interrupted,
+        "termination_reason": termination_reason,
+        "metrics_file": owned_metrics_file,
+    }
+
+# --- 메인 실행 블록 ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="공장 레이아웃 최적화 (유전 알고리즘)")
+    parser.add_argument("--resume", nargs="?", const=CHECKPOINT_FILE, default=None, metavar="CHECKPOINT",
+                        help=f"체크포인트에서 이어서 실행 (경로 생략 시 {CHECKPOINT_FILE})")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="레이아웃 이미지와 분석 그래프를 만들지 않음 (matplotlib을 불러오지 않음)")
+    cli_args = parser.parse_args()
+
+    print("공장 레이아웃 최적화 (유전 알고리즘 버전) - 추가 분석 포함")
+    signal.signal(signal.SIGINT, signal_handler)
+
+    resume_checkpoint = None
+    if cli_args.resume:
+        resume_checkpoint = load_checkpoint(cli_args.resume)
+        globals().update(resume_checkpoint["hyperparameters"]) # 중단 전 설정 그대로 복원
+        PROCESS_SEQUENCE = resume_checkpoint["process_sequence"]
+        machines_definitions = resume_checkpoint["machines_definitions"]
+        print(f"체크포인트에서 재개: {cli_args.resume} (세대 {resume_checkpoint['generation']} 완료 시점)")
+    random.seed(RANDOM_SEED) # 재개하는 경우 난수 상태는 run_ga에서 체크포인트 값으로 복원됨
+    if PROCESS_SEQUENCE is None:
+        PROCESS_SEQUENCE = shuffled_process_sequence(machines_definitions)
+
+    problem = ProblemInstance(machines_definitions, PROCESS_SEQUENCE, FACTORY_WIDTH, FACTORY_HEIGHT,
+                              TARGET_PRODUCTION_PER_HOUR, MATERIAL_TRAVEL_SPEED_UNITS_PER_SECOND)
+    ga_result = run_ga(problem, resume_checkpoint=resume_checkpoint, checkpoint_path=cli_args.resume)
+    best_overall_fitness = ga_result["best_fitness"]
+    best_overall_chromosome = ga_result["best_chromosome"]
+
+    layout_rendering = None
+    if not cli_args.no_plots:
+        try:
+            import layout_rendering # 그래프가 필요할 때만 matplotlib을 불러옴
+        except ImportError: print("matplotlib 라이브러리가 설치되어 있지 않아 그래프를 생성할 수 없습니다.")
 
     # --- 최종 결과 출력 ---
     print("\n--- 최종 결과 (유전 알고리즘) ---")
@@ -467,13 +2215,11 @@ if __name__ == '__main__':
         final_machine_positions_map = {}
         # is_final_layout_valid = True # final_eval_dict_for_best["is_valid"]로 대체
 
-        final_eval_dict_for_best = calculate_fitness(best_overall_chromosome, machines_for_ga_processing_order, PROCESS_SEQUENCE,
-                                                     FACTORY_WIDTH, FACTORY_HEIGHT, TARGET_PRODUCTION_PER_HOUR,
-                                                     MATERIAL_TRAVEL_SPEED_UNITS_PER_SECOND)
+        final_eval_dict_for_best = ga_result["evaluation"]
 
         if final_eval_dict_for_best["is_valid"]:
             # 머신 위치 및 그리드 구성 (print_layout 및 visualize_layout_plt를 위해)
-            for i, machine_def_item in enumerate(machines_for_ga_processing_order):
+            for i, machine_def_item in enumerate(problem.machines_defs):
                 pos_x_final, pos_y_final = best_overall_chromosome[i]
                 place_machine_on_grid(final_grid_layout, machine_def_item["id"], machine_def_item["footprint"], pos_x_final, pos_y_final)
                 final_machine_positions_map[machine_def_item["id"]] = {
@@ -483,18 +2229,19 @@ if __name__ == '__main__':
                 }
             
             # 1. 기존 텍스트 기반 레이아웃 출력
-            print_layout(final_grid_layout, final_machine_positions_map)
+            print_layout(final_grid_layout, final_machine_positions_map, problem)
             
             # 2. [NEW] Matplotlib을 사용한 레이아웃 시각화 및 저장
             layout_image_filename = 'ga_optimized_layout_visualization.png'
             if interrupted: # 전역 변수 interrupted 사용
                  layout_image_filename = 'ga_optimized_layout_visualization_interrupted.png'
-            visualize_layout_plt(final_grid_layout, # 현재 그리드 자체는 visualize_layout_plt에서 직접 사용 안함
-                                 final_machine_positions_map, 
-                                 FACTORY_WIDTH, FACTORY_HEIGHT,
-                                 PROCESS_SEQUENCE, # 시퀀스 정보 전달
-                                 machines_definitions, # 전체 머신 정보 전달
-                                 filename=layout_image_filename)
+            if layout_rendering is not None:
+                layout_rendering.visualize_layout_plt(final_grid_layout, # 현재 그리드 자체는 visualize_layout_plt에서 직접 사용 안함
+                                                      final_machine_positions_map,
+                                                      FACTORY_WIDTH, FACTORY_HEIGHT,
+                                                      PROCESS_SEQUENCE, # 시퀀스 정보 전달
+                                                      machines_definitions, # 전체 머신 정보 전달
+                                                      filename=layout_image_filename)
 
             print(f"해당 레이아웃의 총 이동 거리: {final_eval_dict_for_best['distance']:.2f}")
             print(f"해당 레이아웃의 시간당 생산량: {final_eval_dict_for_best['throughput']:.2f} (목표: {TARGET_PRODUCTION_PER_HOUR})")
@@ -505,49 +2252,14 @@ if __name__ == '__main__':
     else: print("유효한 최적 레이아웃을 찾지 못했습니다.")
 
     # --- 그래프 생성 (matplotlib 필요) ---
-    # 기존 적합도 그래프
-    try:
-        plt.figure(figsize=(12, 7))
-        plt.subplot(2, 2, 1) # 2x2 그리드의 첫 번째 플롯
-        plt.plot(generation_best_fitness_log, label='Best Fitness', color='blue')
-        plt.plot(generation_avg_fitness_log, label='Average Fitness (Valid)', color='cyan', linestyle='--')
-        plt.xlabel('Generation'); plt.ylabel('Fitness')
-        plt.title('GA Fitness Progress'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
-
-        # [NEW] 최고 개체 이동 거리 그래프
-        plt.subplot(2, 2, 2) # 2x2 그리드의 두 번째 플롯
-        # inf 값을 가진 경우 plot에서 제외하거나 매우 큰 값으로 대체 (또는 y_lim 설정)
-        plot_distances = [d if d != float('inf') else max(filter(lambda x: x!=float('inf'), generation_best_distance_log), default=0)*1.1 for d in generation_best_distance_log]
-        if not any(d != float('inf') for d in generation_best_distance_log) and generation_best_distance_log: # 모든 값이 inf인 경우
-            plot_distances = [0] * len(generation_best_distance_log) # 0으로 표시 또는 다른 처리
-
-        plt.plot(plot_distances, label='Best Individual Distance', color='green')
-        plt.xlabel('Generation'); plt.ylabel('Total Distance')
-        plt.title('Best Individual Distance'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
-        if any(d == float('inf') for d in generation_best_distance_log): plt.text(0.05, 0.95, "Note: 'inf' distances capped for plotting", transform=plt.gca().transAxes, fontsize=8, verticalalignment='top')
-
-
-        # [NEW] 최고 개체 생산량 그래프
-        plt.subplot(2, 2, 3) # 2x2 그리드의 세 번째 플롯
-        plt.plot(generation_best_throughput_log, label='Best Individual Throughput', color='red')
-        plt.xlabel('Generation'); plt.ylabel('Throughput')
-        plt.axhline(y=TARGET_PRODUCTION_PER_HOUR, color='gray', linestyle=':', label=f'Target TPH ({TARGET_PRODUCTION_PER_HOUR})')
-        plt.title('Best Individual Throughput'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
-
-        # [NEW] 유효 개체 비율 그래프
-        plt.subplot(2, 2, 4) # 2x2 그리드의 네 번째 플롯
-        plt.plot(generation_valid_ratio_log, label='Valid Individuals Ratio (%)', color='purple')
-        plt.xlabel('Generation'); plt.ylabel('Valid Ratio (%)'); plt.ylim(0, 100)
-        plt.title('Valid Individuals Ratio'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
-        
-        plt.tight_layout() # 플롯 간 간격 자동 조절
+    if layout_rendering is not None:
         graph_filename_output = 'ga_factory_layout_analysis_plots.png'
         if interrupted: graph_filename_output = 'ga_factory_layout_analysis_plots_interrupted.png'
-        plt.savefig(graph_filename_output, dpi=300)
-        print(f"📊 분석 그래프 저장 완료: {graph_filename_output}")
-        plt.close()
-    except ImportError: print("matplotlib 라이브러리가 설치되어 있지 않아 그래프를 생성할 수 없습니다.")
-    except Exception as e_graph: print(f"그래프 생성 중 예상치 못한 오류 발생: {e_graph}")
+        try:
+            if ga_result["metrics_file"]: plot_logs = load_metrics(ga_result["metrics_file"]) # 스트리밍한 지표 파일에서 다시 구성
+            else: plot_logs = ga_result["generation_logs"] # 기본 싱크(GenerationLogSink)가 메모리에 모은 로그
+            layout_rendering.plot_generation_logs(plot_logs, TARGET_PRODUCTION_PER_HOUR, filename=graph_filename_output)
+        except Exception as e_graph: print(f"그래프 생성 중 예상치 못한 오류 발생: {e_graph}")
         
     if interrupted: print("\n✅ 안전하게 중단되었습니다.")
     print("\n프로그램 종료.")
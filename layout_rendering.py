@@ -0,0 +1,138 @@
+"""
+GA_Facility_Optimizer의 결과를 matplotlib으로 그리는 렌더링 모듈입니다.
+최적화 코어는 matplotlib을 불러오지 않으며, 그래프가 필요할 때만 이 모듈을 임포트합니다.
+"""
+import matplotlib.pyplot as plt
+import matplotlib.patches as patches
+import matplotlib.font_manager as fm
+
+# 한글 폰트 설정
+def configure_korean_font(font_family='Malgun Gothic'):
+    """설치된 경우에만 한글 폰트를 지정합니다 (없는 폰트를 지정하면 그릴 때마다 느린 대체 폰트 탐색과 경고가 발생)."""
+    if any(font.name == font_family for font in fm.fontManager.ttflist):
+        plt.rcParams['font.family'] = font_family
+    plt.rcParams['axes.unicode_minus'] =False
+
+configure_korean_font()
+
+def visualize_layout_plt(grid_layout_to_show, machine_positions_map, factory_w, factory_h, process_sequence_list, machine_definitions_list, filename="ga_best_layout.png"):
+    """
+    matplotlib을 사용하여 최종 레이아웃을 시각화하고 파일로 저장합니다.
+    """
+    fig, ax = plt.subplots(1, figsize=(factory_w/2, factory_h/2 + 1)) # 그림 크기 조절
+    ax.set_xlim(-0.5, factory_w - 0.5)
+    ax.set_ylim(-0.5, factory_h - 0.5)
+    ax.set_xticks(range(factory_w))
+    ax.set_yticks(range(factory_h))
+    ax.set_xticklabels(range(factory_w))
+    ax.set_yticklabels(range(factory_h))
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.set_aspect('equal', adjustable='box')
+    ax.invert_yaxis() # 화면 위쪽을 Y=0으로 (일반적인 배열 인덱스와 유사하게)
+
+    # 색상맵 (머신 ID별로 다른 색상) - 수정된 부분
+    cmap = plt.colormaps.get_cmap('viridis')
+    num_machines = len(machine_definitions_list)
+    
+    # PROCESS_SEQUENCE 순서대로 머신 정보 가져오기 위한 딕셔너리
+    machines_dict_by_id = {m['id']: m for m in machine_definitions_list}
+
+    for machine_id_in_seq in process_sequence_list:
+        if machine_id_in_seq in machine_positions_map:
+            pos_data = machine_positions_map[machine_id_in_seq]
+            machine_info = machines_dict_by_id.get(machine_id_in_seq)
+
+            if machine_info:
+                x, y = pos_data['x'], pos_data['y']
+                width, height = machine_info['footprint']
+                clearance = machine_info.get('clearance', 0)
+                
+                # 머신 본체 그리기 - 수정된 색상 사용 방법
+                color_value = machine_id_in_seq / max(num_machines - 1, 1)  # 0~1 사이의 값으로 정규화
+                rect_body = patches.Rectangle((x - 0.5, y - 0.5), width, height,
+                                              linewidth=1.5, edgecolor='black',
+                                              facecolor=cmap(color_value), alpha=0.7)
+                ax.add_patch(rect_body)
+
+                # 머신 ID 및 이름 텍스트 (중앙에 표시)
+                # 글자 크기, 위치 등은 필요에 따라 조절
+                text_x = x + width / 2 - 0.5
+                text_y = y + height / 2 - 0.5
+                ax.text(text_x, text_y, f"M{machine_id_in_seq}\n({machine_info['name'][:5]}..)",
+                        ha='center', va='center', fontsize=6, color='white', weight='bold')
+                
+                # 클리어런스 영역 그리기 (선택적) - 수정된 색상 사용 방법
+                if clearance > 0:
+                    rect_clearance = patches.Rectangle(
+                        (x - clearance - 0.5, y - clearance - 0.5),
+                        width + 2 * clearance, height + 2 * clearance,
+                        linewidth=1, edgecolor=cmap(color_value),
+                        facecolor='none', linestyle=':', alpha=0.5
+                    )
+                    ax.add_patch(rect_clearance)
+
+    plt.title("Optimized Factory Layout (GA)")
+    plt.xlabel("Factory Width (X)")
+    plt.ylabel("Factory Height (Y)")
+    plt.gca().invert_yaxis() # Y축을 위에서 아래로 증가하도록 (일반적인 그리드처럼)
+
+    try:
+        plt.savefig(filename, dpi=300, bbox_inches='tight')
+        print(f"📊 최종 레이아웃 시각화 이미지 저장 완료: {filename}")
+    except Exception as e:
+        print(f"레이아웃 이미지 저장 중 오류 발생: {e}")
+    plt.close(fig) # 다음 플롯을 위해 그림 닫기
+
+
+def plot_generation_logs(generation_logs, target_prod_throughput, filename="ga_factory_layout_analysis_plots.png"):
+    """
+    세대별 로그로 적합도/최고 개체 거리/생산량/유효 개체 비율 2x2 분석 그래프를 그려 파일로 저장합니다.
+
+    Args:
+        generation_logs: run_ga 결과의 "generation_logs" ({"best_fitness": [...], "avg_fitness": [...], ...})
+        target_prod_throughput: 생산량 그래프에 표시할 시간당 목표 생산량
+    """
+    generation_best_fitness_log = generation_logs["best_fitness"]
+    generation_avg_fitness_log = generation_logs["avg_fitness"]
+    generation_best_distance_log = generation_logs["best_distance"]
+    generation_best_throughput_log = generation_logs["best_throughput"]
+    generation_valid_ratio_log = generation_logs["valid_ratio"]
+
+    # 기존 적합도 그래프
+    plt.figure(figsize=(12, 7))
+    plt.subplot(2, 2, 1) # 2x2 그리드의 첫 번째 플롯
+    plt.plot(generation_best_fitness_log, label='Best Fitness', color='blue')
+    plt.plot(generation_avg_fitness_log, label='Average Fitness (Valid)', color='cyan', linestyle='--')
+    plt.xlabel('Generation'); plt.ylabel('Fitness')
+    plt.title('GA Fitness Progress'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
+
+    # [NEW] 최고 개체 이동 거리 그래프
+    plt.subplot(2, 2, 2) # 2x2 그리드의 두 번째 플롯
+    # inf 값을 가진 경우 plot에서 제외하거나 매우 큰 값으로 대체 (또는 y_lim 설정)
+    plot_distances = [d if d != float('inf') else max(filter(lambda x: x!=float('inf'), generation_best_distance_log), default=0)*1.1 for d in generation_best_distance_log]
+    if not any(d != float('inf') for d in generation_best_distance_log) and generation_best_distance_log: # 모든 값이 inf인 경우
+        plot_distances = [0] * len(generation_best_distance_log) # 0으로 표시 또는 다른 처리
+
+    plt.plot(plot_distances, label='Best Individual Distance', color='green')
+    plt.xlabel('Generation'); plt.ylabel('Total Distance')
+    plt.title('Best Individual Distance'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
+    if any(d == float('inf') for d in generation_best_distance_log): plt.text(0.05, 0.95, "Note: 'inf' distances capped for plotting", transform=plt.gca().transAxes, fontsize=8, verticalalignment='top')
+
+
+    # [NEW] 최고 개체 생산량 그래프
+    plt.subplot(2, 2, 3) # 2x2 그리드의 세 번째 플롯
+    plt.plot(generation_best_throughput_log, label='Best Individual Throughput', color='red')
+    plt.xlabel('Generation'); plt.ylabel('Throughput')
+    plt.axhline(y=target_prod_throughput, color='gray', linestyle=':', label=f'Target TPH ({target_prod_throughput})')
+    plt.title('Best Individual Throughput'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
+
+    # [NEW] 유효 개체 비율 그래프
+    plt.subplot(2, 2, 4) # 2x2 그리드의 네 번째 플롯
+    plt.plot(generation_valid_ratio_log, label='Valid Individuals Ratio (%)', color='purple')
+    plt.xlabel('Generation'); plt.ylabel('Valid Ratio (%)'); plt.ylim(0, 100)
+    plt.title('Valid Individuals Ratio'); plt.legend(); plt.grid(True, linestyle=':', alpha=0.7)
+
+    plt.tight_layout() # 플롯 간 간격 자동 조절
+    plt.savefig(filename, dpi=300)
+    print(f"📊 분석 그래프 저장 완료: {filename}")
+    plt.close()
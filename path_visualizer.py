@@ -1,13 +1,20 @@
 import json
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-import heapq # A* 알고리즘의 우선순위 큐에 사용
 from collections import deque
+from pathfinding import DistanceFieldCache, GridPathfinder, a_star_search # 배열 기반 A* 엔진 (a_star_search는 기존 호출 호환용)
 
 # 한글 폰트 설정 (GA_Facility_Optimizer.py와 동일하게)
 plt.rcParams['font.family'] ='Malgun Gothic'
 plt.rcParams['axes.unicode_minus'] =False
 
+# --- 경로 탐색 설정 ---
+PATH_DIAGONAL_MOVES = False # True면 8방향(대각선 포함) 이동, False면 상하좌우 이동만 허용
+PATH_BIDIRECTIONAL = False # True면 양방향 A* 사용 (경로 길이는 동일, 먼 구간에서 탐색 셀 수 감소, "astar" 전략 전용)
+USE_DISTANCE_FIELDS = True # True면 접근점 선택과 (상하좌우 이동 시) 경로를 BFS 거리장으로 계산 (실제 통로 거리), False면 맨해튼 거리 + 구간별 탐색
+OPTIMIZE_ACCESS_POINTS_GLOBALLY = True # True면 공정 순서 전체의 접근점을 동적 계획법으로 한 번에 선택 (통로 거리 합 최소), False면 구간별 탐욕 선택
+PATH_SEARCH_STRATEGY = "astar" # "astar", "jps"(점프 포인트 탐색), "jps+"(점프 거리 표 사용, 레이아웃별 캐시) 중 선택. 경로 길이는 모두 동일
+
 # --- A* 경로 탐색 알고리즘 ---
 def heuristic(a, b):
     """맨해튼 거리 휴리스틱 함수 (상하좌우 이동만 고려 시)"""
@@ -152,8 +159,23 @@ def get_best_access_point(machine_pos_info, machine_def, obstacle_grid, factory_
     print(f"경고: 설비 주변에서 접근 가능한 지점을 찾지 못했습니다. 중심점을 사용합니다: ({center_x}, {center_y})")
     return (center_x, center_y)
 
+def get_nearest_access_point(start_point, machine_pos_info, machine_def, obstacle_grid, factory_w, factory_h, distance_fields):
+    """
+    start_point에서 실제 통로 거리가 가장 가까운 설비 접근점을 찾습니다 (start_point의 거리장 조회).
+
+    Returns:
+        tuple: 접근 지점 (x, y). 닿는 접근점이 없으면 get_best_access_point의 결과
+    """
+    access_points = find_machine_access_points(machine_pos_info, machine_def, obstacle_grid, factory_w, factory_h)
+    distances = distance_fields.distances([start_point], access_points)
+    reachable = [(distance, point) for distance, point in zip(distances, access_points) if distance is not None]
+    if not reachable:
+        return get_best_access_point(machine_pos_info, machine_def, obstacle_grid, factory_w, factory_h)
+    return min(reachable, key=lambda item: item[0])[1]
+
 def get_optimized_access_point_for_sequence(prev_access_point, current_pos_info, current_machine_def, 
-                                          next_pos_info, next_machine_def, obstacle_grid, factory_w, factory_h):
+                                          next_pos_info, next_machine_def, obstacle_grid, factory_w, factory_h,
+                                          distance_fields=None):
     """
     연속된 3개 설비의 경로를 고려하여 중간 설비의 최적 접근 지점을 찾습니다.
     한붓그리기식 경로 최적화를 위해 전체 이동 거리를 최소화합니다.
@@ -167,6 +189,8 @@ def get_optimized_access_point_for_sequence(prev_access_point, current_pos_info,
         obstacle_grid: 장애물 그리드
         factory_w: 공장 너비
         factory_h: 공장 높이
+        distance_fields: DistanceFieldCache를 주면 맨해튼 거리 대신 실제 통로 거리(BFS 거리장)로 평가합니다.
+                         이때 다음 설비까지의 거리는 다음 설비 접근점 중 가장 가까운 것까지의 거리입니다
     
     Returns:
         tuple: 최적 접근 지점 (x, y)
@@ -196,12 +220,23 @@ def get_optimized_access_point_for_sequence(prev_access_point, current_pos_info,
     best_point = None
     min_total_distance = float('inf')
     
-    for current_point in current_access_points:
-        # 이전 → 현재 거리 (맨해튼 거리)
-        dist_prev_to_current = abs(prev_access_point[0] - current_point[0]) + abs(prev_access_point[1] - current_point[1])
-        
-        # 현재 → 다음 거리 (맨해튼 거리) 
-        dist_current_to_next = abs(current_point[0] - next_target[0]) + abs(current_point[1] - next_target[1])
+    if distance_fields is not None:
+        # 이전 → 현재, 현재 → 다음 (실제 통로 거리, 거리장 조회). 다음 설비는 접근점 중 가장 가까운 것까지
+        prev_distances = distance_fields.distances([prev_access_point], current_access_points)
+        next_distances = distance_fields.distances(next_access_points or [next_target], current_access_points)
+    
+    for point_index, current_point in enumerate(current_access_points):
+        if distance_fields is not None:
+            dist_prev_to_current = prev_distances[point_index]
+            dist_current_to_next = next_distances[point_index]
+            if dist_prev_to_current is None or dist_current_to_next is None:
+                continue # 통로로 닿지 않는 접근점
+        else:
+            # 이전 → 현재 거리 (맨해튼 거리)
+            dist_prev_to_current = abs(prev_access_point[0] - current_point[0]) + abs(prev_access_point[1] - current_point[1])
+            
+            # 현재 → 다음 거리 (맨해튼 거리) 
+            dist_current_to_next = abs(current_point[0] - next_target[0]) + abs(current_point[1] - next_target[1])
         
         # 전체 거리
         total_distance = dist_prev_to_current + dist_current_to_next
@@ -216,55 +251,58 @@ def get_optimized_access_point_for_sequence(prev_access_point, current_pos_info,
     
     return best_point
 
-def a_star_search(grid_map, start_coords, goal_coords, factory_w, factory_h):
+def optimize_sequence_access_points(process_sequence, machine_positions, machines_dict, obstacle_grid, factory_w, factory_h,
+                                    distance_fields):
     """
-    A* 알고리즘으로 그리드 맵에서 시작점에서 목표점까지의 경로를 찾습니다.
-    grid_map[x][y] == 1 이면 장애물, 0 이면 통행 가능.
+    공정 순서 전체에서 설비마다 접근점 하나를 골라 연속 구간 통로 거리의 합을 최소화합니다 (Viterbi 동적 계획법).
+    설비 k의 후보(find_machine_access_points)마다 '첫 설비부터 이 후보까지 오는 최소 거리'와 직전 후보를 기록하고,
+    한 단계는 직전 설비의 후보 전체를 누적 거리 층에서 출발시키는 BFS 한 번(min_plus_distances)이므로 설비 수에 선형입니다.
+    후보 집합이 기존 방식의 선택을 포함하므로 총 경로 길이는 기존 방식보다 길어지지 않습니다.
+    
+    Args:
+        process_sequence: 공정 순서 (설비 ID 리스트)
+        machine_positions: {설비 ID 문자열: 위치 정보}
+        machines_dict: {설비 ID: 설비 정의}
+        distance_fields: 같은 obstacle_grid의 DistanceFieldCache
+    
+    Returns:
+        dict: {설비 ID: 접근점 (x, y)}. 위치/정의 정보가 없는 설비는 빠지고, 통로로 이어지지 않는 곳에서는 구간을 나눠 따로 최적화합니다
     """
-    neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0)] # 상하좌우 이동
-    # 대각선 이동 추가 시: neighbors += [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-
-    close_set = set()
-    came_from = {}
-    gscore = {start_coords: 0}
-    fscore = {start_coords: heuristic(start_coords, goal_coords)}
-    oheap = [] # 우선순위 큐
-
-    heapq.heappush(oheap, (fscore[start_coords], start_coords))
-    
-    while oheap:
-        current_fscore, current_node = heapq.heappop(oheap)
-
-        if current_node == goal_coords:
-            path_data = []
-            while current_node in came_from:
-                path_data.append(current_node)
-                current_node = came_from[current_node]
-            path_data.append(start_coords) # 시작점 추가
-            return path_data[::-1] # 경로 뒤집기
-
-        close_set.add(current_node)
-        for i, j in neighbors:
-            neighbor = current_node[0] + i, current_node[1] + j
-            
-            # 그리드 범위 및 장애물 확인
-            if not (0 <= neighbor[0] < factory_w and 0 <= neighbor[1] < factory_h):
-                continue
-            if grid_map[neighbor[0]][neighbor[1]] == 1: # 장애물인 경우
-                continue
-                
-            tentative_g_score = gscore[current_node] + 1 # 이동 비용은 1로 가정
-
-            if neighbor in close_set and tentative_g_score >= gscore.get(neighbor, float('inf')):
-                continue
-                
-            if tentative_g_score < gscore.get(neighbor, float('inf')) or neighbor not in [item[1] for item in oheap]:
-                came_from[neighbor] = current_node
-                gscore[neighbor] = tentative_g_score
-                fscore[neighbor] = tentative_g_score + heuristic(neighbor, goal_coords)
-                heapq.heappush(oheap, (fscore[neighbor], neighbor))
-                
-    return None # 경로를 찾지 못한 경우
+    chosen_points = {}
+    stages = [] # 끊기지 않은 현재 구간: (설비 ID, 후보 리스트, 후보별 누적 거리, 후보별 직전 후보 번호)
+    
+    def backtrack():
+        if not stages:
+            return
+        _, _, last_costs, _ = stages[-1]
+        point_index = min((cost, index) for index, cost in enumerate(last_costs) if cost is not None)[1]
+        for machine_id, candidates, _, back_pointers in reversed(stages):
+            chosen_points[machine_id] = candidates[point_index]
+            point_index = back_pointers[point_index]
+        stages.clear()
+    
+    for machine_id in process_sequence:
+        pos_info = machine_positions.get(str(machine_id))
+        machine_def = machines_dict.get(machine_id)
+        if not pos_info or not machine_def:
+            backtrack()
+            continue
+        candidates = (find_machine_access_points(pos_info, machine_def, obstacle_grid, factory_w, factory_h)
+                      or [get_best_access_point(pos_info, machine_def, obstacle_grid, factory_w, factory_h)])
+        costs, back_pointers = [0] * len(candidates), [None] * len(candidates)
+        if stages:
+            _, prev_candidates, prev_costs, _ = stages[-1]
+            reachable = [index for index, cost in enumerate(prev_costs) if cost is not None]
+            results = distance_fields.min_plus_distances([prev_candidates[index] for index in reachable],
+                                                         [prev_costs[index] for index in reachable], candidates)
+            if any(cost is not None for cost, _ in results):
+                costs = [cost for cost, _ in results]
+                back_pointers = [None if source is None else reachable[source] for _, source in results]
+            else: # 직전 설비에서 통로로 닿지 않으면 구간을 끊고 이 설비부터 새로 시작
+                backtrack()
+        stages.append((machine_id, candidates, costs, back_pointers))
+    backtrack()
+    return chosen_points
 
 # --- 레이아웃 및 경로 시각화 함수 ---
 def visualize_layout_with_paths(layout_data, all_paths, filename="layout_with_paths.png"):
@@ -393,16 +431,29 @@ def main_path_finder(layout_data_file="optimized_layout_data.json"):
                     if 0 <= i < factory_w and 0 <= j < factory_h:
                         obstacle_grid[i][j] = 1 # 설비 몸체는 장애물
 
+    # 같은 장애물 그리드에서 모든 구간을 탐색하므로 탐색기/거리장 캐시를 한 번만 만들어 재사용
+    distance_fields = DistanceFieldCache(obstacle_grid, factory_w, factory_h) if USE_DISTANCE_FIELDS else None
+    pathfinder = GridPathfinder(obstacle_grid, factory_w, factory_h, diagonal=PATH_DIAGONAL_MOVES, strategy=PATH_SEARCH_STRATEGY)
+
     # 3. 연속 경로 최적화를 고려한 경로 탐색 
     print("🚀 한붓그리기식 연속 경로 최적화 시작...")
     all_paths_found = []
     access_points_cache = {}  # 설비별 최적 접근점 캐시
     
+    # 공정 순서 전체의 접근점을 한 번에 결정 (정하지 못한 설비는 아래 구간별 방식으로 선택)
+    planned_access_points = {}
+    if OPTIMIZE_ACCESS_POINTS_GLOBALLY:
+        print("🧭 공정 순서 전체 접근점 최적화 (동적 계획법)...")
+        planned_access_points = optimize_sequence_access_points(
+            process_sequence, machine_positions, machines_dict, obstacle_grid, factory_w, factory_h,
+            distance_fields or DistanceFieldCache(obstacle_grid, factory_w, factory_h))
+        access_points_cache.update(planned_access_points)
+    
     # 첫 번째 설비의 접근점 미리 계산 (기존 방식)
     first_machine_id = process_sequence[0]
     first_pos_info = machine_positions.get(str(first_machine_id))
     first_machine_def = machines_dict.get(first_machine_id)
-    if first_pos_info and first_machine_def:
+    if first_pos_info and first_machine_def and first_machine_id not in access_points_cache:
         access_points_cache[first_machine_id] = get_best_access_point(
             first_pos_info, first_machine_def, obstacle_grid, factory_w, factory_h)
     
@@ -437,7 +488,9 @@ def main_path_finder(layout_data_file="optimized_layout_data.json"):
             access_points_cache[current_machine_id] = start_node
 
         # 목표점 결정 - 연속 경로 최적화 적용
-        if i < len(process_sequence) - 2:  # 중간 설비인 경우 (다음 다음 설비가 존재)
+        if next_machine_id in planned_access_points:
+            goal_node = planned_access_points[next_machine_id]
+        elif i < len(process_sequence) - 2:  # 중간 설비인 경우 (다음 다음 설비가 존재)
             # 다음 다음 설비 정보 가져오기
             next_next_machine_id = process_sequence[i+2]
             next_next_pos_info = machine_positions.get(str(next_next_machine_id))
@@ -448,14 +501,24 @@ def main_path_finder(layout_data_file="optimized_layout_data.json"):
                 goal_node = get_optimized_access_point_for_sequence(
                     start_node, next_pos_info, next_machine_def,
                     next_next_pos_info, next_next_machine_def,
-                    obstacle_grid, factory_w, factory_h)
+                    obstacle_grid, factory_w, factory_h, distance_fields)
                 access_points_cache[next_machine_id] = goal_node
                 print(f"🎯 연속 최적화 적용: 설비 {current_machine_id} → {next_machine_id} → {next_next_machine_id}")
+            elif distance_fields is not None:
+                # 다음 다음 설비 정보가 없으면 시작점에서 통로 거리가 가장 가까운 접근점
+                goal_node = get_nearest_access_point(start_node, next_pos_info, next_machine_def,
+                                                     obstacle_grid, factory_w, factory_h, distance_fields)
+                access_points_cache[next_machine_id] = goal_node
             else:
                 # 다음 다음 설비 정보가 없으면 기존 방식
                 goal_node = get_best_access_point(next_pos_info, next_machine_def, 
                                                 obstacle_grid, factory_w, factory_h)
                 access_points_cache[next_machine_id] = goal_node
+        elif distance_fields is not None:
+            # 마지막 구간: 시작점에서 통로 거리가 가장 가까운 접근점
+            goal_node = get_nearest_access_point(start_node, next_pos_info, next_machine_def,
+                                                 obstacle_grid, factory_w, factory_h, distance_fields)
+            access_points_cache[next_machine_id] = goal_node
         else:
             # 마지막 구간인 경우 기존 방식
             goal_node = get_best_access_point(next_pos_info, next_machine_def, 
@@ -470,7 +533,11 @@ def main_path_finder(layout_data_file="optimized_layout_data.json"):
             all_paths_found.append([start_node, goal_node])
             continue
             
-        path = a_star_search(obstacle_grid, start_node, goal_node, factory_w, factory_h)
+        if distance_fields is not None and not PATH_DIAGONAL_MOVES:
+            # 접근점 선택에 쓴 시작점 거리장을 그대로 따라 내려가므로 추가 탐색이 없음
+            path = distance_fields.path_between(start_node, goal_node)
+        else:
+            path = pathfinder.find_path(start_node, goal_node, bidirectional=PATH_BIDIRECTIONAL)
         
         if path:
             print(f"  경로 발견: {len(path)} 단계")
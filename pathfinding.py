@@ -0,0 +1,529 @@
+"""
+격자 경로 탐색 엔진 (matplotlib 없이 동작).
+
+장애물 그리드를 평탄화한 배열(셀 인덱스 = x * factory_h + y) 위에서 A*를 수행합니다.
+g 점수/부모 인덱스/닫힘 표시를 미리 할당한 배열에 두고, 우선순위 큐는 지연 삭제(lazy deletion)로 관리하므로
+열린 목록을 훑는 멤버십 검사가 없습니다. 배열은 탐색 번호(stamp)로 구분하므로 탐색마다 초기화하지 않습니다.
+
+장애물만 있는 균일 비용 격자이므로 점프 포인트 탐색(JPS)도 제공합니다 (strategy="jps").
+"jps+"는 방향별 점프 거리 표를 미리 계산해 두고 점프를 표 조회 한 번으로 끝내며, 표는 장애물 그리드별로 캐시됩니다.
+DistanceFieldCache는 출발 셀 집합별 BFS 거리장을 캐시해 거리 조회를 O(1)로, 경로는 거리장의 기울기를 따라 얻습니다.
+"""
+import heapq
+import math
+from collections import OrderedDict
+from itertools import chain
+import numpy as np
+
+SQRT2 = math.sqrt(2.0)
+F_KEY_DIGITS = 9 # f 키 반올림 자릿수: √2 누적 오차로 같은 f가 갈라져 h 타이브레이크가 무력해지는 것을 막음
+PATH_STRATEGIES = ("astar", "jps", "jps+") # 경로 탐색 전략: 일반 A* / 점프 포인트 탐색 / 점프 거리 표를 쓰는 JPS+
+JUMP_TABLE_CACHE_SIZE = 8 # 점프 거리 표를 보관할 장애물 그리드 수 (가장 오래된 것부터 버림)
+DISTANCE_FIELD_CACHE_SIZE = 128 # DistanceFieldCache 하나가 보관할 거리장 수 (가장 오래 안 쓴 것부터 버림)
+_UNREACHABLE = {np.dtype(np.uint16): np.iinfo(np.uint16).max, np.dtype(np.uint32): np.iinfo(np.uint32).max} # 거리장 dtype별 도달 불가 값
+_jump_table_cache = {} # (W, H, 대각선 여부, 장애물 bytes) -> {(dx, dy): 점프 거리 리스트}
+_OBSTACLE_BYTES = bytes(1 if value == 1 else 0 for value in range(256)) # 셀 값 1만 장애물 (a_star_search와 동일)
+
+def _blocked_cells(grid_map, factory_w, factory_h):
+    """grid_map[x][y] == 1인 셀을 1로 표시한 길이 W*H의 bytes (x 우선 평탄화)."""
+    if hasattr(grid_map, "tobytes"): # NumPy 배열
+        return (grid_map[:factory_w, :factory_h] == 1).tobytes()
+    try:
+        return bytes(chain.from_iterable(column[:factory_h] for column in grid_map[:factory_w])).translate(_OBSTACLE_BYTES)
+    except ValueError: # 0~255 밖의 셀 값이 있는 경우
+        return bytes(1 if cell == 1 else 0 for column in grid_map[:factory_w] for cell in column[:factory_h])
+
+def _padded_free_cells(blocked, factory_w, factory_h):
+    """통행 가능 셀을 True로, 바깥 테두리 한 칸을 장애물로 둘러싼 (W+2) x (H+2) bool 배열. 점프 탐색에서 범위 검사를 없앱니다."""
+    free = np.zeros((factory_w + 2, factory_h + 2), dtype=bool)
+    free[1:-1, 1:-1] = np.frombuffer(blocked, dtype=np.uint8).reshape(factory_w, factory_h) == 0
+    return free
+
+def _shifted(cells, sx, sy):
+    """result[x, y] = cells[x + sx, y + sy] (테두리에서 넘어가는 값은 쓰이지 않음)."""
+    return np.roll(cells, (-sx, -sy), axis=(0, 1))
+
+def _forced_cells(free, dx, dy):
+    """(dx, dy) 직선 방향으로 들어왔을 때 강제 이웃(옆 칸은 열려 있고 그 뒤 칸은 막힘)이 생기는 셀."""
+    side_x, side_y = (0, 1) if dx else (1, 0)
+    forced = np.zeros_like(free)
+    for sign in (1, -1):
+        forced |= _shifted(free, sign * side_x, sign * side_y) & ~_shifted(free, sign * side_x - dx, sign * side_y - dy)
+    return forced
+
+def _sweep_jump_table(free, jump_cells, dx, dy):
+    """
+    (dx, dy) 방향 점프 거리 표를 한 줄씩 거꾸로 쓸어 계산합니다 (dx != 0, 세로 방향은 전치해서 호출).
+    값 k > 0: k칸 앞이 점프 포인트, k <= 0: -k칸까지 이동 가능하고 그 안에 점프 포인트 없음.
+    """
+    padded_w, padded_h = free.shape
+    table = np.zeros(free.shape, dtype=np.int32)
+    rows, next_rows = slice(1, padded_h - 1), slice(1 + dy, padded_h - 1 + dy)
+    for x in (range(padded_w - 2, 0, -1) if dx > 0 else range(1, padded_w - 1)):
+        nx = x + dx
+        next_distance = table[nx, next_rows]
+        can_step = free[nx, next_rows]
+        if dy: can_step = can_step & free[nx, rows] & free[x, next_rows] # 대각선은 모서리를 가로지르지 않음
+        table[x, rows] = np.where(can_step, np.where(jump_cells[nx, next_rows], 1,
+                                                     np.where(next_distance > 0, next_distance + 1, next_distance - 1)), 0)
+    return table
+
+def _build_jump_tables(free, diagonal):
+    """방향별 점프 거리 표 {(dx, dy): 패딩 셀 인덱스로 조회하는 리스트}."""
+    def straight_table(dx, dy, jump_cells):
+        if dx: return _sweep_jump_table(free, jump_cells, dx, 0)
+        return _sweep_jump_table(free.T, jump_cells.T, dy, 0).T
+    tables = {}
+    for dx in (1, -1):
+        tables[(dx, 0)] = straight_table(dx, 0, _forced_cells(free, dx, 0))
+    for dy in (1, -1):
+        jump_cells = _forced_cells(free, 0, dy)
+        if not diagonal: # 4방향 JPS: 세로 이동 중 가로 점프가 무언가를 찾는 셀도 점프 포인트
+            jump_cells = jump_cells | (tables[(1, 0)] > 0) | (tables[(-1, 0)] > 0)
+        tables[(0, dy)] = straight_table(0, dy, jump_cells)
+    if diagonal:
+        for dx in (1, -1):
+            for dy in (1, -1):
+                jump_cells = (tables[(dx, 0)] > 0) | (tables[(0, dy)] > 0)
+                tables[(dx, dy)] = _sweep_jump_table(free, jump_cells, dx, dy)
+    return {direction: table.ravel().tolist() for direction, table in tables.items()}
+
+def cached_jump_tables(blocked, factory_w, factory_h, diagonal, free=None):
+    """장애물 그리드(bytes)별로 점프 거리 표를 캐시해 같은 레이아웃의 반복 탐색에서 다시 계산하지 않습니다."""
+    key = (factory_w, factory_h, diagonal, blocked)
+    tables = _jump_table_cache.get(key)
+    if tables is None:
+        if free is None: free = _padded_free_cells(blocked, factory_w, factory_h)
+        tables = _build_jump_tables(free, diagonal)
+        while len(_jump_table_cache) >= JUMP_TABLE_CACHE_SIZE:
+            del _jump_table_cache[next(iter(_jump_table_cache))]
+        _jump_table_cache[key] = tables
+    return tables
+
+class GridPathfinder:
+    """
+    장애물 그리드 하나에 대한 경로 탐색기입니다. 같은 그리드에서 여러 구간을 탐색할 때 만들어 두고 재사용합니다.
+
+    Args:
+        grid_map: grid_map[x][y] == 1이면 장애물, 그 외는 통행 가능 (중첩 리스트 또는 NumPy 배열)
+        diagonal: True면 8방향 이동 (대각선 비용 √2, 옥타일 휴리스틱, 장애물 모서리를 가로지르는 대각선 이동 금지).
+                  False면 상하좌우 이동 (비용 1, 맨해튼 휴리스틱)
+        strategy: PATH_STRATEGIES 중 하나. "jps"/"jps+"는 A*와 같은 최단 경로 길이를 훨씬 적은 노드 확장으로 찾습니다
+    """
+    def __init__(self, grid_map, factory_w, factory_h, diagonal=False, strategy="astar"):
+        if strategy not in PATH_STRATEGIES:
+            raise ValueError(f"알 수 없는 경로 탐색 전략: {strategy}")
+        self.factory_w = factory_w
+        self.factory_h = factory_h
+        self.diagonal = diagonal
+        self.strategy = strategy
+        self.blocked = _blocked_cells(grid_map, factory_w, factory_h)
+        self.expanded_nodes = 0 # 마지막 탐색에서 확장한 노드 수
+        self._stamp = 0
+        if strategy == "astar":
+            num_cells = factory_w * factory_h
+            # (dx, dy, 이동 비용, 셀 인덱스 변화량)
+            self.moves = [(0, 1, 1, 1), (0, -1, 1, -1), (1, 0, 1, factory_h), (-1, 0, 1, -factory_h)]
+            if diagonal:
+                self.moves += [(dx, dy, SQRT2, dx * factory_h + dy) for dx in (1, -1) for dy in (1, -1)]
+            self._buffers = [self._new_buffers(num_cells), self._new_buffers(num_cells)] # 정방향 / 역방향(양방향 탐색용)
+        else:
+            # 점프 탐색은 테두리를 장애물로 두른 (W+2) x (H+2) 격자의 인덱스(= (x+1) * (H+2) + y + 1)를 씁니다
+            self._padded_h = factory_h + 2
+            free = _padded_free_cells(self.blocked, factory_w, factory_h)
+            self.free = free.tobytes()
+            self.directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+            if diagonal: self.directions += [(dx, dy) for dx in (1, -1) for dy in (1, -1)]
+            self.jump_tables = cached_jump_tables(self.blocked, factory_w, factory_h, diagonal, free) if strategy == "jps+" else None
+            self._buffers = [self._new_buffers(free.size)]
+
+    @staticmethod
+    def _new_buffers(num_cells):
+        # g 점수, g 점수가 유효한 탐색 번호, 닫힌 탐색 번호, 부모 셀 인덱스
+        return [0] * num_cells, [0] * num_cells, [0] * num_cells, [-1] * num_cells
+
+    def heuristic(self, a, b):
+        """a에서 b까지의 하한 거리 (4방향: 맨해튼, 8방향: 옥타일)."""
+        dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+        if self.diagonal: return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+        return dx + dy
+
+    def find_path(self, start_coords, goal_coords, bidirectional=False):
+        """
+        start_coords에서 goal_coords까지의 최단 경로를 찾습니다.
+
+        Args:
+            bidirectional: True면 시작점과 목표점 양쪽에서 동시에 탐색합니다 (경로 길이는 단방향과 같음, "astar" 전략 전용)
+
+        Returns:
+            list: 시작점과 목표점을 포함한 [(x, y), ...] 경로, 찾지 못하면 None
+        """
+        if bidirectional and self.strategy != "astar":
+            raise ValueError(f"양방향 탐색은 astar 전략에서만 지원합니다: {self.strategy}")
+        start_coords, goal_coords = tuple(start_coords), tuple(goal_coords)
+        self.expanded_nodes = 0
+        if start_coords == goal_coords: return [start_coords]
+        self._stamp += 1
+        if self.strategy != "astar": return self._search_jump_points(start_coords, goal_coords)
+        if bidirectional: return self._search_bidirectional(start_coords, goal_coords)
+        return self._search(start_coords, goal_coords)
+
+    def path_cost(self, path):
+        """경로의 이동 비용 합 (4방향이면 len(path) - 1)."""
+        return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(path, path[1:]))
+
+    def _neighbors(self, u):
+        """(이웃 셀 인덱스, 이동 비용)을 돌려줍니다. 범위 밖/장애물/장애물 모서리를 가로지르는 대각선 이동은 제외."""
+        factory_w, factory_h, blocked = self.factory_w, self.factory_h, self.blocked
+        ux, uy = divmod(u, factory_h)
+        for dx, dy, cost, offset in self.moves:
+            vx, vy = ux + dx, uy + dy
+            if not (0 <= vx < factory_w and 0 <= vy < factory_h): continue
+            v = u + offset
+            if blocked[v]: continue
+            if dx and dy and (blocked[u + dx * factory_h] or blocked[u + dy]): continue
+            yield v, cost
+
+    def _cell_heuristic(self, v, target_x, target_y):
+        vx, vy = divmod(v, self.factory_h)
+        dx, dy = abs(vx - target_x), abs(vy - target_y)
+        if self.diagonal: return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+        return dx + dy
+
+    def _to_coords(self, cells):
+        return [divmod(cell, self.factory_h) for cell in cells]
+
+    def _trace(self, parent, cell):
+        cells = []
+        while cell != -1:
+            cells.append(cell)
+            cell = parent[cell]
+        return cells
+
+    def _search(self, start_coords, goal_coords):
+        factory_h, stamp = self.factory_h, self._stamp
+        g_score, seen, closed, parent = self._buffers[0]
+        goal_x, goal_y = goal_coords
+        source = start_coords[0] * factory_h + start_coords[1]
+        target = goal_x * factory_h + goal_y
+        g_score[source], seen[source], parent[source] = 0, stamp, -1
+        source_h = self._cell_heuristic(source, goal_x, goal_y)
+        open_heap = [(source_h, source_h, source)] # (f, h, 셀): 같은 f면 목표에 가까운(h가 작은) 셀 먼저
+
+        while open_heap:
+            _, _, u = heapq.heappop(open_heap)
+            if closed[u] == stamp: continue # 더 나은 g로 다시 넣기 전의 낡은 항목 (지연 삭제)
+            if u == target: return self._to_coords(self._trace(parent, u)[::-1])
+            closed[u] = stamp
+            self.expanded_nodes += 1
+            g_u = g_score[u]
+            for v, cost in self._neighbors(u):
+                if closed[v] == stamp: continue
+                tentative_g = g_u + cost
+                if seen[v] == stamp and tentative_g >= g_score[v]: continue
+                g_score[v], seen[v], parent[v] = tentative_g, stamp, u
+                h_v = self._cell_heuristic(v, goal_x, goal_y)
+                heapq.heappush(open_heap, (round(tentative_g + h_v, F_KEY_DIGITS), h_v, v))
+        return None
+
+    def _search_bidirectional(self, start_coords, goal_coords):
+        """
+        양방향 A*: 열린 목록 최소 키가 작은 쪽을 번갈아 확장하고, 두 탐색이 만나는 간선마다 최선 경로 비용(best_cost)을 갱신합니다.
+        어느 한쪽의 최소 키가 best_cost 이상이 되면 (휴리스틱이 일관적이므로) 더 짧은 경로가 없어 종료합니다.
+        """
+        factory_h, stamp = self.factory_h, self._stamp
+        source = start_coords[0] * factory_h + start_coords[1]
+        target = goal_coords[0] * factory_h + goal_coords[1]
+        if self.blocked[target]: return None # 단방향 탐색처럼 장애물 셀은 목표로 들어갈 수 없음
+        sides = []
+        for buffers, origin, destination in ((self._buffers[0], source, goal_coords), (self._buffers[1], target, start_coords)):
+            g_score, seen, closed, parent = buffers
+            g_score[origin], seen[origin], parent[origin] = 0, stamp, -1
+            origin_h = self._cell_heuristic(origin, *destination)
+            sides.append((buffers, [(origin_h, origin_h, origin)], destination))
+
+        best_cost, meeting_edge = float('inf'), None # meeting_edge: (정방향 트리 셀, 역방향 트리 셀)
+        while sides[0][1] and sides[1][1]:
+            best_key = round(best_cost, F_KEY_DIGITS) if meeting_edge is not None else best_cost
+            if sides[0][1][0][0] >= best_key or sides[1][1][0][0] >= best_key: break
+            this_side = 0 if sides[0][1][0][0] <= sides[1][1][0][0] else 1
+            (g_score, seen, closed, parent), open_heap, (dest_x, dest_y) = sides[this_side]
+            other_g, other_seen = sides[1 - this_side][0][0], sides[1 - this_side][0][1]
+
+            _, _, u = heapq.heappop(open_heap)
+            if closed[u] == stamp: continue
+            closed[u] = stamp
+            self.expanded_nodes += 1
+            g_u = g_score[u]
+            for v, cost in self._neighbors(u):
+                tentative_g = g_u + cost
+                if other_seen[v] == stamp and tentative_g + other_g[v] < best_cost: # 두 탐색이 만나는 간선
+                    best_cost, meeting_edge = tentative_g + other_g[v], ((u, v) if this_side == 0 else (v, u))
+                if closed[v] == stamp: continue
+                if seen[v] == stamp and tentative_g >= g_score[v]: continue
+                g_score[v], seen[v], parent[v] = tentative_g, stamp, u
+                h_v = self._cell_heuristic(v, dest_x, dest_y)
+                heapq.heappush(open_heap, (round(tentative_g + h_v, F_KEY_DIGITS), h_v, v))
+
+        if meeting_edge is None: return None
+        forward_cells = self._trace(self._buffers[0][3], meeting_edge[0])[::-1] # 시작점 -> 간선의 정방향 쪽 셀
+        backward_cells = self._trace(self._buffers[1][3], meeting_edge[1]) # 간선의 역방향 쪽 셀 -> 목표점
+        return self._to_coords(forward_cells + backward_cells)
+
+    def _search_jump_points(self, start_coords, goal_coords):
+        """
+        점프 포인트 탐색: 직선/대각선으로 강제 이웃이 생기는 점까지 건너뛰고 그 점들만 열린 목록에 넣는 A*입니다.
+        8방향은 모서리 가로지르기 금지 규칙의 가지치기를, 4방향은 세로 이동 중 가로 방향을 살피는 JPS4 규칙을 씁니다.
+        """
+        padded_h, stamp, free = self._padded_h, self._stamp, self.free
+        g_score, seen, closed, parent = self._buffers[0]
+        goal_x, goal_y = goal_coords[0] + 1, goal_coords[1] + 1
+        source = (start_coords[0] + 1) * padded_h + start_coords[1] + 1
+        target = goal_x * padded_h + goal_y
+        if not free[target]: return None
+        jump = self._jump_with_tables if self.jump_tables is not None else self._jump
+        octile = self.diagonal
+        g_score[source], seen[source], parent[source] = 0, stamp, -1
+        source_h = self.heuristic(start_coords, goal_coords)
+        open_heap = [(source_h, source_h, source)]
+
+        while open_heap:
+            _, _, u = heapq.heappop(open_heap)
+            if closed[u] == stamp: continue
+            if u == target: return self._expand_jump_path(self._trace(parent, u)[::-1])
+            closed[u] = stamp
+            self.expanded_nodes += 1
+            g_u = g_score[u]
+            ux, uy = divmod(u, padded_h)
+            for dx, dy in self._pruned_directions(u, ux, uy, parent[u]):
+                v = jump(u, ux, uy, dx, dy, target, goal_x, goal_y)
+                if v < 0 or closed[v] == stamp: continue
+                vx, vy = divmod(v, padded_h)
+                steps = max(abs(vx - ux), abs(vy - uy))
+                tentative_g = g_u + (steps * SQRT2 if dx and dy else steps)
+                if seen[v] == stamp and tentative_g >= g_score[v]: continue
+                g_score[v], seen[v], parent[v] = tentative_g, stamp, u
+                hx, hy = abs(vx - goal_x), abs(vy - goal_y)
+                h_v = max(hx, hy) + (SQRT2 - 1) * min(hx, hy) if octile else hx + hy
+                heapq.heappush(open_heap, (round(tentative_g + h_v, F_KEY_DIGITS), h_v, v))
+        return None
+
+    def _pruned_directions(self, u, ux, uy, parent_cell):
+        """부모에서 들어온 방향 기준으로 살펴볼 이동 방향 (시작점은 모든 방향)."""
+        if parent_cell == -1: return self.directions
+        px, py = divmod(parent_cell, self._padded_h)
+        dx, dy = (ux > px) - (ux < px), (uy > py) - (uy < py)
+        if not self.diagonal: # 4방향: 진행 방향과 그에 수직인 두 방향
+            return [(dx, 0), (0, 1), (0, -1)] if dx else [(0, dy), (1, 0), (-1, 0)]
+        if dx and dy: return [(dx, 0), (0, dy), (dx, dy)]
+        free, padded_h = self.free, self._padded_h
+        offset, side = dx * padded_h + dy, (1 if dx else padded_h)
+        directions = [(dx, dy)]
+        for sign in (1, -1):
+            if free[u + sign * side] and not free[u + sign * side - offset]: # 강제 이웃: 옆 칸과 그 방향 대각선
+                directions += [(0, sign), (dx, sign)] if dx else [(sign, 0), (sign, dy)]
+        return directions
+
+    def _scan(self, cell, offset, side, target, scan_sideways=False):
+        """직선 점프: 목표점이나 강제 이웃이 있는 셀을 돌려주고, 장애물에 막히면 -1."""
+        free, padded_h = self.free, self._padded_h
+        while True:
+            cell += offset
+            if not free[cell]: return -1
+            if cell == target: return cell
+            if (free[cell + side] and not free[cell + side - offset]) or (free[cell - side] and not free[cell - side - offset]):
+                return cell
+            if scan_sideways and (self._scan(cell, padded_h, 1, target) >= 0 or self._scan(cell, -padded_h, 1, target) >= 0):
+                return cell
+
+    def _jump(self, u, ux, uy, dx, dy, target, goal_x, goal_y):
+        """u에서 (dx, dy) 방향으로 다음 점프 포인트를 한 칸씩 찾아갑니다 (JPS)."""
+        padded_h = self._padded_h
+        if not (dx and dy):
+            offset = dx * padded_h + dy
+            return self._scan(u, offset, 1 if dx else padded_h, target, scan_sideways=not self.diagonal and not dx)
+        free, offset_x = self.free, dx * padded_h
+        cell = u
+        while True:
+            if not (free[cell + offset_x] and free[cell + dy] and free[cell + offset_x + dy]): return -1
+            cell += offset_x + dy
+            if cell == target or self._scan(cell, offset_x, 1, target) >= 0 or self._scan(cell, dy, padded_h, target) >= 0:
+                return cell
+
+    def _jump_with_tables(self, u, ux, uy, dx, dy, target, goal_x, goal_y):
+        """점프 거리 표로 다음 점프 포인트를 바로 찾습니다 (JPS+). 표에 없는 목표점은 좌표로 따로 확인합니다."""
+        tables, padded_h = self.jump_tables, self._padded_h
+        offset = dx * padded_h + dy
+        distance = tables[(dx, dy)][u]
+        reach = distance if distance > 0 else -distance
+        if dx and dy:
+            # 대각선 위의 셀 중 목표점과 같은 열/행에 있고, 거기서 직선으로 목표점이 보이면 그 셀에서 멈춤
+            along_x, along_y = (goal_x - ux) * dx, (goal_y - uy) * dy
+            if along_x > 0 and along_y > 0 and min(along_x, along_y) <= reach:
+                cell = u + min(along_x, along_y) * offset
+                if along_x == along_y: return cell
+                if along_x < along_y:
+                    if along_y - along_x <= abs(tables[(0, dy)][cell]): return cell
+                elif along_x - along_y <= abs(tables[(dx, 0)][cell]): return cell
+        elif dx:
+            along = (goal_x - ux) * dx
+            if goal_y == uy and 0 < along <= reach: return target
+        else:
+            along = (goal_y - uy) * dy
+            if 0 < along <= reach:
+                if goal_x == ux: return target
+                if not self.diagonal: # 4방향 세로 점프: 목표점 행에서 가로로 목표점이 보이면 멈춤
+                    cell = u + along * dy
+                    step_x = 1 if goal_x > ux else -1
+                    if abs(goal_x - ux) <= abs(tables[(step_x, 0)][cell]): return cell
+        return u + distance * offset if distance > 0 else -1
+
+    def _expand_jump_path(self, jump_cells):
+        """점프 포인트 사이를 한 칸씩 채워 [(x, y), ...] 경로로 만듭니다."""
+        points = [(x - 1, y - 1) for x, y in (divmod(cell, self._padded_h) for cell in jump_cells)]
+        path = [points[0]]
+        for (ax, ay), (bx, by) in zip(points, points[1:]):
+            step_x, step_y = (bx > ax) - (bx < ax), (by > ay) - (by < ay)
+            path += [(ax + k * step_x, ay + k * step_y) for k in range(1, max(abs(bx - ax), abs(by - ay)) + 1)]
+        return path
+
+class DistanceFieldCache:
+    """
+    장애물 그리드(레이아웃) 하나에 대한 상하좌우 이동 BFS 거리장 캐시입니다.
+    출발 셀 집합(예: 설비 하나의 접근점들)마다 다중 출발점 BFS를 한 번만 수행하고,
+    이후 어느 셀에서든 그 집합까지의 통로 거리를 배열 조회 한 번으로 얻습니다.
+
+    거리는 uint16으로 저장하며(최대 거리가 넘치는 거리장만 uint32), 도달할 수 없는 셀은 그 dtype의 최대값입니다.
+    출발 셀은 장애물이어도 거리 0에서 시작하지만, 장애물 셀로 들어가는 이동은 없습니다 (GridPathfinder와 동일).
+    """
+    def __init__(self, grid_map, factory_w, factory_h, max_fields=None):
+        self.factory_w = factory_w
+        self.factory_h = factory_h
+        self._padded_h = factory_h + 2
+        self._free = _padded_free_cells(_blocked_cells(grid_map, factory_w, factory_h), factory_w, factory_h).ravel()
+        self._offsets = np.array([1, -1, self._padded_h, -self._padded_h])
+        self._slot = np.zeros(self._free.size, dtype=np.int64) # BFS 층의 중복 셀 제거용 작업 배열
+        self._fields = OrderedDict() # 출발 셀 집합 -> 패딩된 평탄 거리 배열
+        self.max_fields = DISTANCE_FIELD_CACHE_SIZE if max_fields is None else max_fields
+
+    def _cell(self, point):
+        return (point[0] + 1) * self._padded_h + point[1] + 1
+
+    def _padded_field(self, sources):
+        key = frozenset(map(tuple, sources))
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+        if not key: raise ValueError("거리장의 출발 셀이 비어 있습니다")
+        unreachable = _UNREACHABLE[np.dtype(np.uint32)]
+        field = np.full(self._free.size, unreachable, dtype=np.uint32)
+        frontier = np.unique([self._cell(point) for point in key])
+        field[frontier] = 0
+        distance = 0
+        while frontier.size: # 한 층씩 넓혀 가는 BFS (층 단위로 벡터화)
+            distance += 1
+            neighbors = (frontier[:, None] + self._offsets).ravel()
+            neighbors = neighbors[self._free[neighbors] & (field[neighbors] == unreachable)]
+            # 같은 셀이 여러 번 나오면 마지막으로 쓴 위치만 남김 (정렬 없이 O(층 크기))
+            positions = np.arange(neighbors.size)
+            self._slot[neighbors] = positions
+            frontier = neighbors[self._slot[neighbors] == positions]
+            field[frontier] = distance
+        if distance - 1 < _UNREACHABLE[np.dtype(np.uint16)]: # 최대 거리가 들어가면 uint16으로 줄여 보관 (도달 불가 표시도 함께 바꿈)
+            field = np.where(field == unreachable, _UNREACHABLE[np.dtype(np.uint16)], field).astype(np.uint16)
+        self._fields[key] = field
+        while len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    def field(self, sources):
+        """sources까지의 거리장 (W x H 배열, field[x, y], 도달 불가 = np.iinfo(field.dtype).max)."""
+        return self._padded_field(sources).reshape(self.factory_w + 2, self._padded_h)[1:-1, 1:-1]
+
+    def distance(self, sources, point):
+        """point에서 sources 중 가장 가까운 셀까지의 통로 거리, 도달할 수 없으면 None."""
+        field = self._padded_field(sources)
+        value = int(field[self._cell(point)])
+        return None if value == _UNREACHABLE[field.dtype] else value
+
+    def distances(self, sources, points):
+        """distance()를 여러 점에 대해 한 번에 조회합니다 (거리장 조회 1회)."""
+        field = self._padded_field(sources)
+        unreachable = _UNREACHABLE[field.dtype]
+        values = field[[self._cell(point) for point in points]].tolist() if points else []
+        return [None if value == unreachable else value for value in values]
+
+    def min_plus_distances(self, sources, source_costs, targets):
+        """
+        targets의 각 점 t에 대해 min_s (source_costs[s] + 통로 거리(s, t))와 그 최소를 만드는 출발 셀 번호를 구합니다.
+        출발 셀을 각자의 비용 층에서 넣는 BFS 한 번으로 계산하며, 모든 목표 셀이 정해지면 멈춥니다 (캐시하지 않음).
+
+        Returns:
+            list: 목표점마다 (비용, sources 인덱스), 닿지 않으면 (None, None)
+        """
+        source_cells = [self._cell(point) for point in sources]
+        target_cells = np.array([self._cell(point) for point in targets], dtype=np.int64)
+        order = sorted(range(len(sources)), key=lambda index: source_costs[index])
+        cost = np.full(self._free.size, -1, dtype=np.int64)
+        origin = np.full(self._free.size, -1, dtype=np.int64)
+        frontier = np.zeros(0, dtype=np.int64)
+        next_source, level = 0, source_costs[order[0]] if order else 0
+        while next_source < len(order) or frontier.size:
+            if not frontier.size: level = max(level, source_costs[order[next_source]]) # 다음 출발 셀의 층으로 건너뜀
+            injected = []
+            while next_source < len(order) and source_costs[order[next_source]] <= level:
+                index = order[next_source]
+                cell = source_cells[index]
+                if cost[cell] < 0:
+                    cost[cell], origin[cell] = level, index
+                    injected.append(cell)
+                next_source += 1
+            if injected: frontier = np.concatenate([frontier, injected])
+            if (cost[target_cells] >= 0).all(): break
+            neighbors = (frontier[:, None] + self._offsets).ravel()
+            parents = np.repeat(frontier, self._offsets.size)
+            keep = self._free[neighbors] & (cost[neighbors] < 0)
+            neighbors, parents = neighbors[keep], parents[keep]
+            positions = np.arange(neighbors.size)
+            self._slot[neighbors] = positions
+            unique = self._slot[neighbors] == positions
+            frontier = neighbors[unique]
+            level += 1
+            cost[frontier], origin[frontier] = level, origin[parents[unique]]
+        return [(None, None) if value < 0 else (value, source) for value, source in
+                zip(cost[target_cells].tolist(), origin[target_cells].tolist())]
+
+    def path_to_sources(self, sources, start):
+        """start에서 거리장의 기울기를 따라 sources 중 가장 가까운 셀까지 가는 최단 경로 [(x, y), ...], 없으면 None."""
+        field = self._padded_field(sources)
+        cell = self._cell(start)
+        distance = int(field[cell])
+        if distance == _UNREACHABLE[field.dtype]: return None
+        field = memoryview(field) # 원소 하나씩 읽을 때는 NumPy 스칼라보다 빠름
+        cells = [cell]
+        while distance > 0:
+            for offset in (1, -1, self._padded_h, -self._padded_h):
+                if field[cell + offset] == distance - 1:
+                    cell += offset
+                    break
+            distance -= 1
+            cells.append(cell)
+        return [(x - 1, y - 1) for x, y in (divmod(cell, self._padded_h) for cell in cells)]
+
+    def path_between(self, start, goal):
+        """start의 거리장을 재사용해 start -> goal 최단 경로를 만듭니다 (접근점 선택에 쓴 거리장과 같은 것)."""
+        path = self.path_to_sources([start], goal)
+        return None if path is None else path[::-1]
+
+def a_star_search(grid_map, start_coords, goal_coords, factory_w, factory_h, diagonal=False, bidirectional=False, strategy="astar"):
+    """
+    A* 알고리즘으로 그리드 맵에서 시작점에서 목표점까지의 경로를 찾습니다.
+    grid_map[x][y] == 1 이면 장애물, 0 이면 통행 가능.
+    같은 그리드에서 여러 번 탐색한다면 GridPathfinder를 한 번 만들어 find_path를 호출하는 편이 빠릅니다.
+
+    Returns:
+        list: [(x, y), ...] 경로 (시작점, 목표점 포함), 찾지 못하면 None
+    """
+    pathfinder = GridPathfinder(grid_map, factory_w, factory_h, diagonal=diagonal, strategy=strategy)
+    return pathfinder.find_path(start_coords, goal_coords, bidirectional=bidirectional)